@@ -7,11 +7,26 @@ v2.1: 新增 Wallet_Log, Period, Bank_Account sheets
 import streamlit as st
 import gspread
 from google.oauth2.service_account import Credentials
+from google.auth.transport.requests import Request
 import pandas as pd
+import numpy as np
 from datetime import datetime, date, timedelta
 from typing import Optional
 from zoneinfo import ZoneInfo
+import os
+import json
+import re
+import tempfile
 import time
+import functools
+import random
+import threading
+import itertools
+import math
+import numbers
+from contextlib import contextmanager
+from collections import deque
+from pathlib import Path
 
 # =============================================================================
 # 常數定義
@@ -44,6 +59,14 @@ WALLET_ALLOCATE_OUT = "Allocate_Out"
 WALLET_TRANSFER_IN = "Transfer_In"
 WALLET_ADJUSTMENT = "Adjustment"
 
+# 各 Wallet_Log Type 對錢包餘額的正負號：餘額 = Σ Amount × 正負號
+WALLET_SIGNS = {
+    WALLET_INCOME: 1.0,
+    WALLET_ALLOCATE_OUT: -1.0,
+    WALLET_TRANSFER_IN: 1.0,
+    WALLET_ADJUSTMENT: 1.0
+}
+
 # Transaction Types (v2.1 簡化)
 TYPE_EXPENSE = "Expense"
 TYPE_SAVING_IN = "Saving_In"
@@ -56,6 +79,14 @@ TYPE_TRANSFER = "Transfer"
 PAYMENT_CREDIT = "Credit"
 PAYMENT_DIRECT = "Direct"
 
+# 支付方式下拉選單（選項固定，對照表只建一次；tuple 避免被誤改）
+PAYMENT_OPTIONS = ("（未設定）", "直接付款", "信用卡")
+PAYMENT_OPTION_VALUES = ("", PAYMENT_DIRECT, PAYMENT_CREDIT)
+# 新增目標 / 資金池的「預設支付方式」選單（同一組值，第 0 項標示為不設定預設值）
+PAYMENT_DEFAULT_OPTIONS = ("（不設定）", "直接付款", "信用卡")
+PAYMENT_OPTION_CODES = dict(zip(PAYMENT_OPTIONS, PAYMENT_OPTION_VALUES))
+PAYMENT_OPTION_INDEX = {code: i for i, code in enumerate(PAYMENT_OPTION_VALUES) if code}
+
 # Period Status (v2.1 新增)
 PERIOD_ACTIVE = "Active"
 PERIOD_SETTLED = "Settled"
@@ -71,6 +102,11 @@ SHEET_TRANSACTION = "Transaction"
 SHEET_SETTLEMENT_LOG = "Settlement_Log"
 SHEET_CONFIG = "Config"
 
+ALL_SHEETS = [
+    SHEET_BANK_ACCOUNT, SHEET_WALLET_LOG, SHEET_PERIOD, SHEET_CATEGORY, SHEET_SUB_TAG,
+    SHEET_SAVING_GOAL, SHEET_TRANSACTION, SHEET_SETTLEMENT_LOG, SHEET_CONFIG
+]
+
 # Google Sheets API Scopes
 SCOPES = [
     "https://www.googleapis.com/auth/spreadsheets",
@@ -89,6 +125,9 @@ def get_gspread_client():
             st.secrets["gcp_service_account"],
             scopes=SCOPES
         )
+        # 建立連線時就先取得 access token，第一次讀取不必再等 token 交換；
+        # 之後過期由 gspread 的 AuthorizedSession 在請求前自動更新
+        credentials.refresh(Request())
         client = gspread.authorize(credentials)
         return client
     except Exception as e:
@@ -114,168 +153,815 @@ def get_spreadsheet():
 # 資料存取層 - 讀取
 # =============================================================================
 
-@st.cache_data(ttl=60)
-def load_all_data() -> dict:
-    """一次載入所有 9 張 sheet 資料（減少 API 呼叫）"""
+def _values_to_df(values: list, numeric_cols: tuple = ()) -> pd.DataFrame:
+    """
+    將 get_all_values() 的結果直接組成 DataFrame（第一列為標題）。
+
+    get_all_values 回傳的都是字串，金額類欄位在這裡統一轉成 float64
+    （去除千分位逗號，空白或無法解析視為 0），之後使用端不必再逐筆 float()。
+
+    逐欄轉置後各自建成一維陣列，不經過整張表的 object 二維陣列，
+    峰值記憶體約等於最終 DataFrame 的大小。
+    """
+    if not values:
+        return pd.DataFrame()
+
+    headers = values[0]
+    # 轉置成欄；列長不一時缺的儲存格補空字串，超出標題寬度的部分捨棄
+    columns = itertools.islice(itertools.zip_longest(*values[1:], fillvalue=""), len(headers))
+    data = {}
+    for i, (header, column) in enumerate(itertools.zip_longest(headers, columns, fillvalue=())):
+        series = pd.Series(column, dtype=object if not column else None)
+        if header in numeric_cols:
+            series = pd.to_numeric(
+                series.astype(str).str.replace(",", "", regex=False).str.strip(),
+                errors="coerce"
+            ).fillna(0.0).astype("float64")
+        data[i] = series
+    df = pd.DataFrame(data)
+    df.columns = headers
+    return df
+
+
+@st.cache_resource(ttl=600)
+def _worksheet_handles() -> dict:
+    """
+    sheet 名稱 → Worksheet 物件（一次 worksheets() 取得全部）。
+
+    spreadsheet.worksheet(name) 每次都會重新讀取 metadata；
+    sheet 結構很少變動，快取後讀寫都不必再多一次 API 呼叫。
+    """
     spreadsheet = get_spreadsheet()
     if spreadsheet is None:
-        return {
-            "bank_accounts": pd.DataFrame(),
-            "wallet_log": pd.DataFrame(),
-            "periods": pd.DataFrame(),
-            "categories": pd.DataFrame(),
-            "sub_tags": pd.DataFrame(),
-            "saving_goals": pd.DataFrame(),
-            "transactions": pd.DataFrame(),
-            "settlement_log": pd.DataFrame(),
-            "config": {}
-        }
+        return {}
+    return {ws.title: ws for ws in spreadsheet.worksheets()}
+
+
+def _get_worksheet(sheet_name: str):
+    """取得 Worksheet（快取中找不到時重新取得清單再試一次，仍找不到則拋出 WorksheetNotFound）"""
+    handles = _worksheet_handles()
+    if sheet_name not in handles:
+        _worksheet_handles.clear()
+        handles = _worksheet_handles()
+    if sheet_name not in handles:
+        raise gspread.exceptions.WorksheetNotFound(sheet_name)
+    return handles[sheet_name]
+
+
+def _parse_dates(values: pd.Series) -> pd.Series:
+    """
+    日期欄位轉 datetime：先用寫入時的固定格式 %Y-%m-%d（向量化快速路徑），
+    試算表顯示格式不同（例如 2026/10/15）而解析失敗的值，再交給自動推斷。
+    """
+    parsed = pd.to_datetime(values, format="%Y-%m-%d", errors="coerce", cache=True)
+    failed = parsed.isna() & values.ne("")
+    if failed.any():
+        parsed[failed] = pd.to_datetime(values[failed], errors="coerce")
+    return parsed
+
+
+def _as_category(df: pd.DataFrame, cols) -> pd.DataFrame:
+    """
+    低基數字串欄位轉成 category：記憶體改存整數代碼，
+    `== "Active"` 這類等值過濾改成比對代碼，不必逐筆比較字串。
+    """
+    for col in cols:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    return df
+
+
+def _map_category_codes(values: pd.Series, mapping: dict, default: str) -> np.ndarray:
+    """
+    category 欄位查對照表：只對 categories（不重複值）查一次 dict，
+    再用整數代碼 gather 回每一列；代碼 -1（空值）落在最後一格的預設值。
+    """
+    lookup = np.array([mapping.get(c, default) for c in values.cat.categories] + [default], dtype=object)
+    return lookup[values.cat.codes.to_numpy()]
+
+
+def _fetch_all_sheet_values(spreadsheet) -> dict:
+    """
+    一次 batchGet 讀取全部 9 張 sheet，回傳 {sheet 名稱: 二維字串 list}。
+
+    只對實際存在的 sheet 發出請求（不存在的範圍會讓整個 batchGet 失敗），
+    不存在的 sheet 回傳空 list。API 會省略列尾空白儲存格，
+    這裡用 fill_gaps 補齊成與 get_all_values 相同的矩形。
+    """
+    raw = {name: [] for name in ALL_SHEETS}
 
+    names = [name for name in ALL_SHEETS if name in _worksheet_handles()]
+    if not names:
+        return raw
+
+    try:
+        response = spreadsheet.values_batch_get([f"'{name}'" for name in names])
+    except gspread.exceptions.APIError:
+        # sheet 清單可能已過時（sheet 被刪除或改名）：重新取得清單後再試一次
+        _worksheet_handles.clear()
+        names = [name for name in ALL_SHEETS if name in _worksheet_handles()]
+        if not names:
+            return raw
+        response = spreadsheet.values_batch_get([f"'{name}'" for name in names])
+
+    for name, value_range in zip(names, response.get("valueRanges", [])):
+        values = value_range.get("values", [])
+        raw[name] = gspread.utils.fill_gaps(values) if values else []
+    return raw
+
+
+def _fetch_sheet_values(sheet_name: str) -> list:
+    """讀取單張 sheet 的所有儲存格（sheet 不存在時回傳空 list）"""
     try:
-        data = {}
+        return _get_worksheet(sheet_name).get_all_values()
+    except gspread.exceptions.WorksheetNotFound:
+        return []
 
-        # Bank_Account
-        try:
-            ws = spreadsheet.worksheet(SHEET_BANK_ACCOUNT)
-            data["bank_accounts"] = pd.DataFrame(ws.get_all_records())
-        except gspread.exceptions.WorksheetNotFound:
-            data["bank_accounts"] = pd.DataFrame()
 
-        # Wallet_Log
-        try:
-            ws = spreadsheet.worksheet(SHEET_WALLET_LOG)
-            df = pd.DataFrame(ws.get_all_records())
-            if not df.empty and "Date" in df.columns:
-                df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-            data["wallet_log"] = df
-        except gspread.exceptions.WorksheetNotFound:
-            data["wallet_log"] = pd.DataFrame()
-
-        # Period
-        try:
-            ws = spreadsheet.worksheet(SHEET_PERIOD)
-            df = pd.DataFrame(ws.get_all_records())
-            if not df.empty:
-                if "Start_Date" in df.columns:
-                    df["Start_Date"] = pd.to_datetime(df["Start_Date"], errors="coerce")
-                if "End_Date" in df.columns:
-                    df["End_Date"] = pd.to_datetime(df["End_Date"], errors="coerce")
-            data["periods"] = df
-        except gspread.exceptions.WorksheetNotFound:
-            data["periods"] = pd.DataFrame()
-
-        # Category
-        try:
-            ws = spreadsheet.worksheet(SHEET_CATEGORY)
-            data["categories"] = pd.DataFrame(ws.get_all_records())
-        except gspread.exceptions.WorksheetNotFound:
-            data["categories"] = pd.DataFrame()
+# 預取結果的磁碟快照：程序重啟（冷啟動）時，TTL 內直接從快照載入，不呼叫 API
+SNAPSHOT_PATH = Path.home() / ".cache" / "budget_level" / "snapshot.json"
+SNAPSHOT_TTL_SECONDS = 60
 
-        # Sub_Tag
-        try:
-            ws = spreadsheet.worksheet(SHEET_SUB_TAG)
-            data["sub_tags"] = pd.DataFrame(ws.get_all_records())
-        except gspread.exceptions.WorksheetNotFound:
-            data["sub_tags"] = pd.DataFrame()
 
-        # Saving_Goal
-        try:
-            ws = spreadsheet.worksheet(SHEET_SAVING_GOAL)
-            data["saving_goals"] = pd.DataFrame(ws.get_all_records())
-        except gspread.exceptions.WorksheetNotFound:
-            data["saving_goals"] = pd.DataFrame()
+def _read_snapshot(spreadsheet_id: str) -> Optional[dict]:
+    """讀取磁碟快照；不存在、已過期或屬於別的試算表時回傳 None"""
+    try:
+        with open(SNAPSHOT_PATH, encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if snapshot.get("spreadsheet_id") != spreadsheet_id:
+        return None
+    if time.time() - snapshot.get("fetched_at", 0) > SNAPSHOT_TTL_SECONDS:
+        return None
+    raw = snapshot.get("sheets", {})
+    return {name: raw.get(name, []) for name in ALL_SHEETS}
 
-        # Transaction
-        try:
-            ws = spreadsheet.worksheet(SHEET_TRANSACTION)
-            df = pd.DataFrame(ws.get_all_records())
-            if not df.empty and "Date" in df.columns:
-                df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-            data["transactions"] = df
-        except gspread.exceptions.WorksheetNotFound:
-            data["transactions"] = pd.DataFrame()
-
-        # Settlement_Log
-        try:
-            ws = spreadsheet.worksheet(SHEET_SETTLEMENT_LOG)
-            data["settlement_log"] = pd.DataFrame(ws.get_all_records())
-        except gspread.exceptions.WorksheetNotFound:
-            data["settlement_log"] = pd.DataFrame()
 
-        # Config
-        try:
-            ws = spreadsheet.worksheet(SHEET_CONFIG)
-            config_data = ws.get_all_records()
-            data["config"] = {row["Key"]: row["Value"] for row in config_data if "Key" in row}
-        except gspread.exceptions.WorksheetNotFound:
-            data["config"] = {}
+def _write_snapshot(spreadsheet_id: str, raw: dict):
+    """寫入磁碟快照（先寫暫存檔再 os.replace，多個程序同時寫入也不會讀到半個檔案）"""
+    try:
+        SNAPSHOT_PATH.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=SNAPSHOT_PATH.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"spreadsheet_id": spreadsheet_id, "fetched_at": time.time(), "sheets": raw}, f)
+        os.replace(tmp_path, SNAPSHOT_PATH)
+    except OSError:
+        pass  # 快照只是加速用，寫不進去就算了
+
 
-        return data
+def _discard_snapshot():
+    """寫入後刪除磁碟快照，避免重啟後載入過時資料"""
+    try:
+        SNAPSHOT_PATH.unlink()
+    except OSError:
+        pass
+
+
+@st.cache_resource(ttl=60)
+def _prefetch_all_sheet_values() -> dict:
+    """
+    預取全部 sheet 的原始值（一次 batchGet），供各 sheet 的載入函式共用。
+
+    冷啟動時 9 個載入函式同時失效，第一個觸發預取，其餘直接取用，
+    仍然只有一次 API 呼叫。內容只讀，用 cache_resource 避免每次取用都複製。
+    程序剛重啟且磁碟快照未過期時，直接使用快照。
+    """
+    spreadsheet = get_spreadsheet()
+    if spreadsheet is None:
+        return {name: [] for name in ALL_SHEETS}
+    # 重新預取後所有 sheet 都是最新的（先清再讀，讀取期間的寫入仍會留在 dirty）
+    _dirty_sheets().clear()
+
+    raw = _read_snapshot(spreadsheet.id)
+    if raw is None:
+        raw = _fetch_all_sheet_values(spreadsheet)
+        _write_snapshot(spreadsheet.id, raw)
+    return raw
 
+
+@st.cache_resource
+def _dirty_sheets() -> set:
+    """寫入後尚未重新讀取的 sheet（預取內容對它們已經過時）"""
+    return set()
+
+
+def _get_sheet_values(sheet_name: str) -> list:
+    """
+    取得單張 sheet 的原始值。
+
+    - 寫入過的 sheet：只重新讀取這一張，並存回預取結果
+    - 多張 sheet 同時寫入過：重新預取一次 batchGet
+    - 其餘：取用預取結果
+    """
+    try:
+        raw = _prefetch_all_sheet_values()
+        dirty = _dirty_sheets()
+        if sheet_name in dirty:
+            if len(dirty) > 1:
+                _prefetch_all_sheet_values.clear()
+                raw = _prefetch_all_sheet_values()
+            else:
+                dirty.discard(sheet_name)
+                if get_spreadsheet() is not None:
+                    raw[sheet_name] = _fetch_sheet_values(sheet_name)
+        return raw[sheet_name]
     except Exception as e:
-        st.error(f"載入資料失敗: {e}")
-        return {
-            "bank_accounts": pd.DataFrame(),
-            "wallet_log": pd.DataFrame(),
-            "periods": pd.DataFrame(),
-            "categories": pd.DataFrame(),
-            "sub_tags": pd.DataFrame(),
-            "saving_goals": pd.DataFrame(),
-            "transactions": pd.DataFrame(),
-            "settlement_log": pd.DataFrame(),
-            "config": {}
-        }
+        st.error(f"載入資料失敗（{sheet_name}）: {e}")
+        return []
+
+
+# 載入函式的快取統計：記錄目前是否在快取未命中時實際執行（巢狀呼叫時逐層還原）
+_cache_probe = threading.local()
 
 
+def _tracked_cache_data(ttl: int):
+    """
+    取代 @st.cache_data(ttl=...)，另外記錄每個函式的呼叫次數、未命中次數與累計耗時。
+
+    統計存在 st.session_state["_cache_stats"]：{函式名稱: [呼叫, 未命中, 秒數]}，
+    顯示在「連線狀態與資料統計」，用來找出拖慢重繪的載入函式。
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def compute(*args, **kwargs):
+            _cache_probe.miss = True
+            return func(*args, **kwargs)
+
+        # 載入函式只從預取結果組 DataFrame，不會等網路，不必顯示 spinner
+        cached = st.cache_data(ttl=ttl, show_spinner=False)(compute)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            outer_miss = getattr(_cache_probe, "miss", False)
+            _cache_probe.miss = False
+            start = time.perf_counter()
+            try:
+                return cached(*args, **kwargs)
+            finally:
+                stats = st.session_state.setdefault("_cache_stats", {}).setdefault(func.__name__, [0, 0, 0.0])
+                stats[0] += 1
+                stats[1] += _cache_probe.miss
+                stats[2] += time.perf_counter() - start
+                _cache_probe.miss = outer_miss
+
+        wrapper.clear = cached.clear
+        return wrapper
+
+    return decorator
+
+
+# 每張 sheet 各自快取：寫入時只需讓被修改的 sheet 失效（見 invalidate_sheet_cache），
+# 而且 st.cache_data 每次呼叫都會複製回傳值，分開快取後每次只複製用到的那一張。
+@_tracked_cache_data(ttl=60)
 def load_bank_accounts() -> pd.DataFrame:
     """載入銀行帳戶"""
-    return load_all_data()["bank_accounts"]
+    return _as_category(_values_to_df(_get_sheet_values(SHEET_BANK_ACCOUNT)), ("Status",))
 
 
+@_tracked_cache_data(ttl=60)
 def load_wallet_log() -> pd.DataFrame:
     """載入錢包記錄"""
-    return load_all_data()["wallet_log"]
+    df = _values_to_df(_get_sheet_values(SHEET_WALLET_LOG), ("Amount",))
+    if not df.empty and "Date" in df.columns:
+        df["Date"] = _parse_dates(df["Date"])
+    # 依 Type 預先算好帶正負號的金額，錢包餘額只需加總這一欄
+    if "Type" in df.columns and "Amount" in df.columns:
+        sign = df["Type"].map(WALLET_SIGNS).fillna(0.0).to_numpy(dtype="float64")
+        df["SignedAmount"] = df["Amount"].to_numpy() * sign
+    return df
 
 
+@_tracked_cache_data(ttl=60)
 def load_periods() -> pd.DataFrame:
     """載入週期資料"""
-    return load_all_data()["periods"]
+    df = _values_to_df(_get_sheet_values(SHEET_PERIOD), ("Living_Budget",))
+    if not df.empty:
+        if "Start_Date" in df.columns:
+            df["Start_Date"] = _parse_dates(df["Start_Date"])
+        if "End_Date" in df.columns:
+            df["End_Date"] = _parse_dates(df["End_Date"])
+    return _as_category(df, ("Status",))
 
 
+@_tracked_cache_data(ttl=60)
 def load_categories() -> pd.DataFrame:
     """載入 Living 科目"""
-    return load_all_data()["categories"]
+    df = _values_to_df(_get_sheet_values(SHEET_CATEGORY), ("Budget",))
+    # 使用端直接取用 Budget 欄；sheet 沒有這欄時補 0
+    if "Budget" not in df.columns:
+        df["Budget"] = 0.0
+    # 快速記帳旗標在載入時就轉成布林欄，每次重繪不必再做字串轉換
+    if "Is_Quick_Access" in df.columns:
+        df["QuickAccess"] = df["Is_Quick_Access"].astype(str).str.upper().isin({"TRUE", "1", "Y", "YES"})
+    return _as_category(df, ("Status",))
 
 
+@_tracked_cache_data(ttl=60)
 def load_sub_tags() -> pd.DataFrame:
     """載入科目子類"""
-    return load_all_data()["sub_tags"]
+    return _as_category(_values_to_df(_get_sheet_values(SHEET_SUB_TAG)), ("Status", "Category_ID"))
 
 
+@_tracked_cache_data(ttl=60)
 def load_saving_goals() -> pd.DataFrame:
     """載入儲蓄目標"""
-    return load_all_data()["saving_goals"]
+    df = _values_to_df(_get_sheet_values(SHEET_SAVING_GOAL), ("Target_Amount", "Accumulated"))
+    # 有目標 / 資金池的旗標在載入時就轉成布林欄（規則同 is_has_target）；
+    # 使用端直接取用 HasTarget / Target_Amount，sheet 沒有對應欄時補預設值
+    if "Has_Target" in df.columns:
+        df["HasTarget"] = df["Has_Target"].astype(str).str.upper().eq("TRUE")
+    else:
+        df["HasTarget"] = False
+    if "Target_Amount" not in df.columns:
+        df["Target_Amount"] = 0.0
+    return _as_category(df, ("Status",))
 
 
+@_tracked_cache_data(ttl=60)
 def load_transactions() -> pd.DataFrame:
     """載入所有交易記錄"""
-    return load_all_data()["transactions"]
-
-
+    df = _values_to_df(_get_sheet_values(SHEET_TRANSACTION), ("Amount",))
+    if not df.empty and "Date" in df.columns:
+        df["Date"] = _parse_dates(df["Date"])
+        # 載入時就依日期新到舊排好（穩定排序，保留原始 index），
+        # 每次重繪不必再排序；需要原始順序時用 sort_index()
+        df = df.sort_values("Date", ascending=False, kind="mergesort")
+    df = _as_category(df, (
+        "Type", "Account", "Target_Account", "Payment_Method",
+        "Period_ID", "Category_ID", "Sub_Tag_ID", "Goal_ID", "Bank_ID"
+    ))
+    # 高基數文字欄位改用 Arrow 字串：比 object 欄位省記憶體，
+    # 字串比對 / .str 操作走 Arrow 的向量化 kernel
+    for col in ["Txn_ID", "Timestamp", "Item", "Note", "Ref"]:
+        if col in df.columns:
+            df[col] = df[col].fillna("").astype("string[pyarrow]")
+    return df
+
+
+@_tracked_cache_data(ttl=60)
 def load_settlement_log() -> pd.DataFrame:
     """載入結算記錄"""
-    return load_all_data()["settlement_log"]
+    return _values_to_df(
+        _get_sheet_values(SHEET_SETTLEMENT_LOG), ("budget", "total_expense", "net_result")
+    )
 
 
+@_tracked_cache_data(ttl=60)
 def load_config() -> dict:
     """載入系統設定"""
-    return load_all_data()["config"]
+    config_df = _values_to_df(_get_sheet_values(SHEET_CONFIG))
+    if "Key" not in config_df.columns or "Value" not in config_df.columns:
+        return {}
+    return dict(zip(config_df["Key"], config_df["Value"]))
+
+
+def load_all_data() -> dict:
+    """載入所有 9 張 sheet 資料（由各 sheet 的快取組合而成）"""
+    return {
+        "bank_accounts": load_bank_accounts(),
+        "wallet_log": load_wallet_log(),
+        "periods": load_periods(),
+        "categories": load_categories(),
+        "sub_tags": load_sub_tags(),
+        "saving_goals": load_saving_goals(),
+        "transactions": load_transactions(),
+        "settlement_log": load_settlement_log(),
+        "config": load_config()
+    }
+
+
+def invalidate_sheet_cache(*sheet_names: str):
+    """
+    寫入後讓指定 sheet 的快取失效（取代清空全部的 st.cache_data.clear()）。
+
+    連同由這些 sheet 衍生的彙總快取一併清除，下次讀取只重新抓被修改的 sheet。
+    """
+    _dirty_sheets().update(sheet_names)
+    _discard_snapshot()
+    _clear_sheet_dependents(*sheet_names)
+
+
+def _clear_sheet_dependents(*sheet_names: str):
+    """
+    清除由指定 sheet 衍生的所有 st.cache_data 快取（不重新讀取原始值）。
+
+    新增依賴某張 sheet 的快取函式時，要加進下方對照表。
+    """
+    dependents = {
+        SHEET_BANK_ACCOUNT: [load_bank_accounts, get_bank_name_map, get_active_bank_choices],
+        SHEET_WALLET_LOG: [load_wallet_log, get_wallet_balance, compute_dashboard_state],
+        SHEET_PERIOD: [load_periods, _load_active_period_info, compute_dashboard_state],
+        SHEET_CATEGORY: [load_categories, get_category_name_map, get_category_defaults_map],
+        SHEET_SUB_TAG: [load_sub_tags, get_sub_tag_defaults_map],
+        SHEET_SAVING_GOAL: [load_saving_goals, get_transfer_choices],
+        SHEET_TRANSACTION: [
+            load_transactions, compute_dashboard_state, get_period_living_expenses,
+            get_recent_living_expenses, get_saving_balances,
+            get_saving_transactions, _saving_transactions_by_goal, get_transaction_totals,
+            get_goal_actual_expenses, get_transactions_csv
+        ],
+        SHEET_SETTLEMENT_LOG: [load_settlement_log],
+        SHEET_CONFIG: [load_config, compute_dashboard_state],
+    }
+
+    for name in sheet_names:
+        for func in dependents[name]:
+            func.clear()
+    get_data_counts.clear()
+
+
+@st.cache_data(ttl=60)
+def get_category_name_map() -> dict:
+    """Category_ID → 科目名稱 對照表"""
+    categories = load_categories()
+    if categories.empty:
+        return {}
+    return dict(zip(categories["Category_ID"], categories["Name"]))
+
+
+@st.cache_data(ttl=60)
+def get_data_counts() -> dict:
+    """
+    各 sheet 資料筆數（連線狀態用，只回傳整數不複製整份資料）
+
+    直接由原始值的列數計算（扣掉標題列），不必為了筆數建出 9 個 DataFrame；
+    Config 的筆數是設定項目數，沿用 load_config()。
+    """
+    counts = {name: max(len(_get_sheet_values(name)) - 1, 0) for name in ALL_SHEETS}
+    counts[SHEET_CONFIG] = len(load_config())
+    return counts
+
+
+@st.cache_data(ttl=60)
+def get_bank_name_map() -> dict:
+    """Bank_ID → 銀行帳戶名稱 對照表"""
+    bank_accounts = load_bank_accounts()
+    if bank_accounts.empty:
+        return {}
+    return dict(zip(bank_accounts["Bank_ID"], bank_accounts["Name"]))
+
+
+@st.cache_data(ttl=60)
+def get_active_bank_choices() -> tuple[list, list, dict]:
+    """
+    啟用中的銀行帳戶（名稱 list, Bank_ID list, {Bank_ID: 選項位置}），供下拉選單使用
+
+    下拉選單第 0 項固定是「未設定」，所以選項位置從 1 開始；預設值查不到時用 .get(..., 0)。
+    """
+    bank_accounts = load_bank_accounts()
+    if bank_accounts.empty:
+        return [], [], {}
+    active_banks = bank_accounts[bank_accounts["Status"] == "Active"]
+    bank_ids = active_banks["Bank_ID"].tolist()
+    return active_banks["Name"].tolist(), bank_ids, {bid: i for i, bid in enumerate(bank_ids, start=1)}
+
+
+@st.cache_data(ttl=60)
+def get_transfer_choices() -> tuple[list, list, dict]:
+    """
+    轉帳 Dialog 的選項：(轉出選項 list, 轉入選項 list, {選項: (帳戶, Goal_ID)})
+
+    進行中的 Saving 目標以「Saving: 名稱」列在 Back Up 之前。
+    """
+    goal_labels, goal_ids = [], []
+    saving_goals = load_saving_goals()
+    if not saving_goals.empty and "Status" in saving_goals.columns:
+        active_goals = saving_goals[saving_goals["Status"] == "Active"]
+        goal_labels = [f"Saving: {name}" for name in active_goals["Name"]]
+        goal_ids = active_goals["Goal_ID"].tolist()
+
+    accounts = {
+        "Wallet": (ACCOUNT_WALLET, ""),
+        "Free Fund": (ACCOUNT_FREEFUND, ""),
+        "Back Up": (ACCOUNT_BACKUP, ""),
+    }
+    accounts.update((label, (ACCOUNT_SAVING, goal_id)) for label, goal_id in zip(goal_labels, goal_ids))
+
+    source_options = ["Free Fund", *goal_labels, "Back Up"]
+    target_options = ["Wallet", "Free Fund", *goal_labels, "Back Up"]
+    return source_options, target_options, accounts
 
 
 # =============================================================================
 # 資料存取層 - 寫入
 # =============================================================================
 
+@st.cache_resource
+def _id_counter():
+    """ID 序號計數器（跨 rerun 與 session 共用）"""
+    return itertools.count()
+
+
+def _make_id(prefix: str, now: Optional[datetime] = None) -> str:
+    """
+    產生記錄 ID：前綴 + 秒級時間戳 + 3 位數序號。
+
+    只用秒級時間戳時，同一秒內的多筆寫入（例如批次寫入）會產生重複 ID；
+    加上全域遞增序號後即使同一秒也不會重複。
+    """
+    now = now or get_taiwan_now()
+    return f"{prefix}{now:%Y%m%d%H%M%S}{next(_id_counter()) % 1000:03d}"
+
+
+# Sheets 寫入配額（WriteRequestsPerMinutePerUser）：超過會回 429
+WRITE_REQUESTS_PER_MINUTE = 60
+WRITE_MAX_RETRIES = 5
+# 等待寫入額度的上限（秒）：超過就回報錯誤，不讓頁面一直卡住
+WRITE_SLOT_MAX_WAIT = 30
+
+
+@st.cache_resource
+def _write_limiter() -> dict:
+    """
+    寫入節流狀態（所有 session 共用，因為配額是算在同一個服務帳號上）
+
+    stamps 記錄最近 60 秒內每次寫入的時間（token bucket 的滑動視窗版本）
+    """
+    return {"lock": threading.Lock(), "stamps": deque()}
+
+
+def _wait_write_slot():
+    """
+    等到最近 60 秒內的寫入次數低於上限才放行。
+
+    鎖只用來檢查 / 登記額度，等待時放開鎖，其他 session 不會被擋住；
+    累計等待超過 WRITE_SLOT_MAX_WAIT 秒時丟出 RuntimeError，由呼叫端顯示錯誤。
+    """
+    limiter = _write_limiter()
+    stamps = limiter["stamps"]
+    deadline = time.monotonic() + WRITE_SLOT_MAX_WAIT
+    while True:
+        with limiter["lock"]:
+            now = time.monotonic()
+            while stamps and now - stamps[0] >= 60:
+                stamps.popleft()
+            if len(stamps) < WRITE_REQUESTS_PER_MINUTE:
+                stamps.append(now)
+                return
+            wait = 60 - (now - stamps[0])
+        if now + wait > deadline:
+            raise RuntimeError("寫入次數已達每分鐘上限，請稍後再試")
+        time.sleep(wait)
+
+
+def _sheets_write(write_fn, *args, **kwargs):
+    """
+    執行一次 Sheets 寫入：先取得寫入額度，遇到 429 以指數退避重試
+
+    用法：_sheets_write(ws.append_row, row, value_input_option="USER_ENTERED")
+    """
+    for attempt in range(WRITE_MAX_RETRIES):
+        _wait_write_slot()
+        try:
+            return write_fn(*args, **kwargs)
+        except gspread.exceptions.APIError as e:
+            if e.response.status_code != 429 or attempt == WRITE_MAX_RETRIES - 1:
+                raise
+            time.sleep(2 ** attempt + random.random())
+
+
+def _append_values(sheet_name: str, rows: list):
+    """
+    在 sheet 尾端新增多列（直接呼叫 spreadsheets.values.append）。
+
+    不需要 Worksheet 物件，直接以 sheet 名稱作為範圍，一次新增就是一次 API 呼叫。
+    請求走 gspread client 共用的 AuthorizedSession，連線會保持 keep-alive。
+    """
+    _sheets_write(
+        get_spreadsheet().values_append,
+        f"'{sheet_name}'",
+        {"valueInputOption": "USER_ENTERED"},
+        {"values": rows},
+    )
+
+
+# Google Sheets 日期序號的起點；appendCells 不會解析字串，日期要自己轉成序號
+_SHEETS_EPOCH = datetime(1899, 12, 30)
+_DATE_CELL_FORMATS = [
+    ("%Y-%m-%d %H:%M:%S", {"type": "DATE_TIME", "pattern": "yyyy-mm-dd hh:mm:ss"}),
+    ("%Y-%m-%d", {"type": "DATE", "pattern": "yyyy-mm-dd"}),
+]
+# USER_ENTERED 會當成數字的字串（可含千分位逗號）
+_NUMERIC_CELL_PATTERN = re.compile(r"[+-]?(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?|[+-]?\.\d+")
+
+
+def _to_cell_data(value) -> dict:
+    """
+    把一個儲存格值轉成 appendCells 的 CellData，結果與 USER_ENTERED 解析相同：
+    數字（含 numpy 數值與 "1,000" 這類數字字串）→ 數值、TRUE/FALSE → 布林、
+    寫入用的日期字串 → 日期序號 + 日期格式、NaN / 空值 → 空白、其餘 → 文字
+    """
+    if isinstance(value, (bool, np.bool_)):
+        return {"userEnteredValue": {"boolValue": bool(value)}}
+    if isinstance(value, numbers.Number):
+        # NaN / inf 不是合法的 JSON 數值，與 values.append 的空值一樣寫成空白
+        number = float(value) if isinstance(value, numbers.Real) else None
+        if number is None or not math.isfinite(number):
+            return {}
+        if isinstance(value, numbers.Integral):
+            return {"userEnteredValue": {"numberValue": int(value)}}
+        return {"userEnteredValue": {"numberValue": number}}
+
+    text = "" if value is None else str(value)
+    if not text:
+        return {}
+    if text in ("TRUE", "FALSE"):
+        return {"userEnteredValue": {"boolValue": text == "TRUE"}}
+    if _NUMERIC_CELL_PATTERN.fullmatch(text):
+        return {"userEnteredValue": {"numberValue": float(text.replace(",", ""))}}
+    if len(text) in (10, 19) and text[4] == "-":
+        for fmt, number_format in _DATE_CELL_FORMATS:
+            try:
+                parsed = datetime.strptime(text, fmt)
+            except ValueError:
+                continue
+            serial = (parsed - _SHEETS_EPOCH).total_seconds() / 86400
+            return {
+                "userEnteredValue": {"numberValue": serial},
+                "userEnteredFormat": {"numberFormat": number_format},
+            }
+    return {"userEnteredValue": {"stringValue": text}}
+
+
+def _batch_update_cells(rows_by_sheet: dict, cell_updates: list):
+    """
+    新增列與儲存格修改合併成一次 spreadsheets.batchUpdate：
+    每張 sheet 一個 appendCells，每個修改的儲存格一個 updateCells。
+    跨 sheet 的批次寫入只佔一次 API 呼叫與一個寫入額度，且整批一起成功或失敗。
+
+    cell_updates: [(sheet 名稱, 列號, 欄號, 值)]，列號與欄號從 1 起算
+    """
+    requests = [
+        {
+            "appendCells": {
+                "sheetId": _get_worksheet(sheet_name).id,
+                "rows": [{"values": [_to_cell_data(v) for v in row]} for row in rows],
+                "fields": "userEnteredValue,userEnteredFormat.numberFormat",
+            }
+        }
+        for sheet_name, rows in rows_by_sheet.items()
+    ]
+    for sheet_name, row_number, col_number, value in cell_updates:
+        cell = _to_cell_data(value)
+        requests.append({
+            "updateCells": {
+                "start": {
+                    "sheetId": _get_worksheet(sheet_name).id,
+                    "rowIndex": row_number - 1,
+                    "columnIndex": col_number - 1,
+                },
+                "rows": [{"values": [cell]}],
+                # 只有日期儲存格帶數字格式；其餘只寫值，保留儲存格原有的格式（同 USER_ENTERED）
+                "fields": (
+                    "userEnteredValue,userEnteredFormat.numberFormat"
+                    if "userEnteredFormat" in cell else "userEnteredValue"
+                ),
+            }
+        })
+    _sheets_write(get_spreadsheet().batch_update, {"requests": requests})
+
+
+def _cached_values_for_write(sheet_name: str) -> Optional[list]:
+    """
+    寫入前取得預取結果中該 sheet 的原始值，供寫入成功後直接附加新列。
+
+    一定要在寫入前取得：預取若剛好過期，重新讀取的內容不能已經含有新列。
+    該 sheet 待重新讀取（dirty）或沒有表頭時回傳 None，改走一般失效流程。
+    """
+    if sheet_name in _dirty_sheets():
+        return None
+    try:
+        values = _prefetch_all_sheet_values()[sheet_name]
+    except Exception:
+        return None
+    return values if values else None
+
+
+def _write_through(sheet_name: str, values: Optional[list], rows: list):
+    """
+    寫入成功後把新列附加到預取的原始值（write-through），
+    下次重繪由快取重建 DataFrame，不必再讀一次整張 sheet。
+
+    預取期間已被重新讀取（內容可能已含新列）時改為讓該 sheet 失效。
+    """
+    if values is None or _prefetch_all_sheet_values().get(sheet_name) is not values:
+        invalidate_sheet_cache(sheet_name)
+        return
+
+    width = len(values[0])
+    for row in rows:
+        cells = ["" if v is None else str(v) for v in row][:width]
+        values.append(cells + [""] * (width - len(cells)))
+    _discard_snapshot()
+    _clear_sheet_dependents(sheet_name)
+
+
+# 批次寫入佇列（每個執行緒各自一份，避免不同 session 互相干擾）
+_write_batch = threading.local()
+
+# 最近寫入的送出識別碼數量上限（用於擋下重複送出）
+RECENT_WRITES_MAX = 64
+
+
+def _is_duplicate_submission(submission_id: str) -> bool:
+    """這個送出識別碼是否已經寫入過（連點按鈕、重跑造成的重複送出）"""
+    return bool(submission_id) and submission_id in st.session_state.get("_recent_writes", ())
+
+
+def _record_submission(submission_id: str):
+    """登記已寫入的送出識別碼"""
+    st.session_state.setdefault(
+        "_recent_writes", deque(maxlen=RECENT_WRITES_MAX)
+    ).append(submission_id)
+
+
+@contextmanager
+def batch_writes():
+    """
+    批次寫入區塊：區塊內 add_* 新增的列與 update_* 修改的欄位先排入佇列，
+    離開區塊時一次寫入（N 筆、跨多張 sheet → 1 次 API 呼叫）。
+
+    ID 與列號在排入佇列時就已決定，add_* / update_* 的回傳值不變；
+    區塊內發生例外時佇列直接丟棄，不會寫入一半。
+    """
+    if getattr(_write_batch, "pending", None) is not None:
+        # 巢狀使用時併入外層批次
+        yield
+        return
+
+    _write_batch.pending = {}
+    _write_batch.cell_updates = []
+    _write_batch.row_checks = {}
+    _write_batch.submission_ids = []
+    try:
+        yield
+        flush_pending_writes()
+        # 送出識別碼等整批寫入成功後才登記，寫入失敗時可以重送
+        for submission_id in _write_batch.submission_ids:
+            _record_submission(submission_id)
+    finally:
+        _write_batch.pending = None
+        _write_batch.cell_updates = None
+        _write_batch.row_checks = None
+        _write_batch.submission_ids = None
+
+
+def flush_pending_writes():
+    """
+    把佇列中的寫入送出：
+    只有一張 sheet 的新增列時用一次 values.append；
+    多張 sheet 或含欄位修改時合併成一次 batchUpdate。
+    """
+    pending = getattr(_write_batch, "pending", None)
+    cell_updates = getattr(_write_batch, "cell_updates", None)
+    if not pending and not cell_updates:
+        return
+
+    # 欄位修改的列號在排入佇列時來自快取，送出前一次確認（列被手動搬動時改寫到正確的列）
+    row_checks = getattr(_write_batch, "row_checks", None)
+    if cell_updates and row_checks:
+        verified = _verify_row_numbers(row_checks)
+        missing = [row_checks[key] for key in row_checks if key not in verified]
+        if missing:
+            raise ValueError(f"找不到記錄：{', '.join(missing)}")
+        cell_updates[:] = [
+            (sheet_name, verified.get((sheet_name, row_number), row_number), col, value)
+            for sheet_name, row_number, col, value in cell_updates
+        ]
+        row_checks.clear()
+
+    if len(pending) > 1 or cell_updates:
+        cached = {sheet_name: _cached_values_for_write(sheet_name) for sheet_name in pending}
+        _batch_update_cells(pending, cell_updates)
+        for sheet_name, rows in list(pending.items()):
+            del pending[sheet_name]
+            _write_through(sheet_name, cached[sheet_name], rows)
+        if cell_updates:
+            updated_sheets = {update[0] for update in cell_updates}
+            cell_updates.clear()
+            invalidate_sheet_cache(*updated_sheets)
+        return
+
+    for sheet_name, rows in list(pending.items()):
+        cached = _cached_values_for_write(sheet_name)
+        _append_values(sheet_name, rows)
+        del pending[sheet_name]
+        _write_through(sheet_name, cached, rows)
+
+
+def _append_row(sheet_name: str, row: list):
+    """新增一列：批次區塊內排入佇列，否則立即寫入並直接併入快取"""
+    pending = getattr(_write_batch, "pending", None)
+    if pending is not None:
+        pending.setdefault(sheet_name, []).append(row)
+        return
+
+    cached = _cached_values_for_write(sheet_name)
+    _append_values(sheet_name, [row])
+    _write_through(sheet_name, cached, [row])
+
+
 def add_wallet_log(
     log_type: str,
     amount: float,
@@ -301,10 +987,12 @@ def add_wallet_log(
         return False
 
     try:
-        worksheet = spreadsheet.worksheet(SHEET_WALLET_LOG)
+        # 同一列的 ID / Timestamp / Date 共用同一個時間點，時間字串只格式化一次
+        now = get_taiwan_now()
+        timestamp = f"{now:%Y-%m-%d %H:%M:%S}"
 
-        # 產生 Log_ID (WL + timestamp)
-        log_id = f"WL{get_taiwan_now().strftime('%Y%m%d%H%M%S')}"
+        # 產生 Log_ID (WL + timestamp + 序號)
+        log_id = _make_id("WL", now)
 
         # 確保 amount 是 Python 原生類型
         amount = float(amount)
@@ -312,8 +1000,8 @@ def add_wallet_log(
         # 欄位順序：Log_ID | Timestamp | Date | Type | Amount | Bank_ID | Note | Ref
         row = [
             log_id,                                          # Log_ID
-            get_taiwan_now().strftime("%Y-%m-%d %H:%M:%S"),  # Timestamp
-            get_taiwan_now().strftime("%Y-%m-%d"),           # Date
+            timestamp,                                       # Timestamp
+            timestamp[:10],                                  # Date
             log_type,                                        # Type
             amount,                                          # Amount
             bank_id,                                         # Bank_ID
@@ -321,8 +1009,7 @@ def add_wallet_log(
             ref                                              # Ref
         ]
 
-        worksheet.append_row(row, value_input_option="USER_ENTERED")
-        st.cache_data.clear()
+        _append_row(SHEET_WALLET_LOG, row)
         return True
 
     except Exception as e:
@@ -351,10 +1038,8 @@ def add_period(
         return ""
 
     try:
-        worksheet = spreadsheet.worksheet(SHEET_PERIOD)
-
-        # 產生 Period_ID (PER + timestamp)
-        period_id = f"PER{get_taiwan_now().strftime('%Y%m%d%H%M%S')}"
+        # 產生 Period_ID (PER + timestamp + 序號)
+        period_id = _make_id("PER")
 
         # 確保 living_budget 是 Python 原生類型
         living_budget = float(living_budget)
@@ -369,8 +1054,7 @@ def add_period(
             ""                                      # Settled_At (空)
         ]
 
-        worksheet.append_row(row, value_input_option="USER_ENTERED")
-        st.cache_data.clear()
+        _append_row(SHEET_PERIOD, row)
         return period_id
 
     except Exception as e:
@@ -397,10 +1081,8 @@ def add_bank_account(
         return False
 
     try:
-        worksheet = spreadsheet.worksheet(SHEET_BANK_ACCOUNT)
-
-        # 產生 Bank_ID (BANK + timestamp)
-        bank_id = f"BANK{get_taiwan_now().strftime('%Y%m%d%H%M%S')}"
+        # 產生 Bank_ID (BANK + timestamp + 序號)
+        bank_id = _make_id("BANK")
 
         # 欄位順序：Bank_ID | Name | Note | Status
         row = [
@@ -410,8 +1092,7 @@ def add_bank_account(
             "Active"    # Status
         ]
 
-        worksheet.append_row(row, value_input_option="USER_ENTERED")
-        st.cache_data.clear()
+        _append_row(SHEET_BANK_ACCOUNT, row)
         return True
 
     except Exception as e:
@@ -432,20 +1113,27 @@ def add_transaction(
     ref: str = "",
     period_id: str = "",
     bank_id: str = "",
-    payment_method: str = ""
+    payment_method: str = "",
+    submission_id: str = ""
 ) -> bool:
     """
     新增交易記錄 (v2.1 新增 Period_ID, Bank_ID, Payment_Method)
+
+    submission_id 為表單送出識別碼（見 _submission_id）：同一識別碼只寫入一次，
+    重複送出直接回傳 True（呼叫端可先用 _is_duplicate_submission 提示使用者）；
+    未提供時不做去重。
     """
     spreadsheet = get_spreadsheet()
     if spreadsheet is None:
         return False
 
     try:
-        worksheet = spreadsheet.worksheet(SHEET_TRANSACTION)
+        # 同一列的 ID / Timestamp / Date 共用同一個時間點，時間字串只格式化一次
+        now = get_taiwan_now()
+        timestamp = f"{now:%Y-%m-%d %H:%M:%S}"
 
         # 產生交易 ID
-        trans_id = f"TXN{get_taiwan_now().strftime('%Y%m%d%H%M%S')}"
+        trans_id = _make_id("TXN", now)
 
         # 確保 amount 是 Python 原生類型
         amount = float(amount)
@@ -455,8 +1143,8 @@ def add_transaction(
         # Goal_ID | Target_Account | Item | Note | Ref | Period_ID | Bank_ID | Payment_Method
         row = [
             trans_id,                                        # Txn_ID
-            get_taiwan_now().strftime("%Y-%m-%d %H:%M:%S"),  # Timestamp
-            get_taiwan_now().strftime("%Y-%m-%d"),           # Date
+            timestamp,                                       # Timestamp
+            timestamp[:10],                                  # Date
             trans_type,                                      # Type
             amount,                                          # Amount
             account,                                         # Account
@@ -472,8 +1160,17 @@ def add_transaction(
             payment_method                                   # Payment_Method (v2.1 新增)
         ]
 
-        worksheet.append_row(row, value_input_option="USER_ENTERED")
-        st.cache_data.clear()
+        # 防止重複送出（連點按鈕）：同一次表單送出只寫入一次
+        if _is_duplicate_submission(submission_id):
+            return True
+
+        _append_row(SHEET_TRANSACTION, row)
+        if submission_id:
+            batch_ids = getattr(_write_batch, "submission_ids", None)
+            if batch_ids is not None:
+                batch_ids.append(submission_id)
+            else:
+                _record_submission(submission_id)
         return True
 
     except Exception as e:
@@ -504,27 +1201,134 @@ def update_bank_account(
         return False
 
     try:
-        worksheet = spreadsheet.worksheet(SHEET_BANK_ACCOUNT)
-        all_data = worksheet.get_all_records()
-
         # 找到該 Bank_ID 的 row
-        for idx, row in enumerate(all_data):
-            if row.get("Bank_ID") == bank_id:
-                row_number = idx + 2  # +2 因為 header 佔第 1 行，idx 從 0 開始
+        row_number = _find_row_number(SHEET_BANK_ACCOUNT, bank_id)
+        if row_number is None:
+            st.error(f"找不到帳戶：{bank_id}")
+            return False
+
+        # 欄位順序：Bank_ID | Name | Note | Status
+        # 更新 Name (B), Note (C), Status (D)
+        worksheet = _get_worksheet(SHEET_BANK_ACCOUNT)
+        _sheets_write(worksheet.update, f"B{row_number}:D{row_number}", [[name, note, status]])
 
-                # 欄位順序：Bank_ID | Name | Note | Status
-                # 更新 Name (B), Note (C), Status (D)
-                worksheet.update(f"B{row_number}:D{row_number}", [[name, note, status]])
+        invalidate_sheet_cache(SHEET_BANK_ACCOUNT)
+        return True
 
-                st.cache_data.clear()
-                return True
+    except Exception as e:
+        st.error(f"更新銀行帳戶失敗: {e}")
+        return False
+
+
+@st.cache_data(ttl=300)
+def _id_row_map(sheet_name: str) -> dict:
+    """
+    sheet 第一欄 ID → 列號（標題列為第 1 列）。
+
+    直接由預取的 sheet 內容建立，不另外呼叫 API。內容可能來自磁碟快照，
+    也可能落後於在試算表上手動刪除、排序或插入的列，所以只當作候選列號：
+    寫入前由 _verify_row_numbers 讀回該列第一欄確認，不符時重新讀取 sheet 重建。
+    """
+    values = _get_sheet_values(sheet_name)
+    return {row[0]: idx + 2 for idx, row in enumerate(values[1:]) if row}
+
+
+@st.cache_data(ttl=3600)
+def _sheet_headers(sheet_name: str) -> list:
+    """
+    sheet 標題列（欄位結構執行期間不會變，長時間快取省去每次更新前的讀取）。
+
+    優先取自預取的 sheet 內容；sheet 沒有資料時才單獨讀取第一列。
+    """
+    values = _get_sheet_values(sheet_name)
+    if values:
+        return list(values[0])
+    return _get_worksheet(sheet_name).row_values(1)
+
+
+def _find_row_number(sheet_name: str, record_id: str) -> Optional[int]:
+    """
+    依 ID 找列號，快取中找不到時重新建立一次索引。
+
+    找到的列號會確認第一欄仍是這個 ID：批次區塊內先記下，離開區塊時
+    與其他列一起用一次 batchGet 確認（見 flush_pending_writes）；否則立即確認。
+    """
+    row_number = _id_row_map(sheet_name).get(record_id)
+    if row_number is None:
+        _id_row_map.clear()
+        row_number = _id_row_map(sheet_name).get(record_id)
+    if row_number is None:
+        return None
+
+    row_checks = getattr(_write_batch, "row_checks", None)
+    if row_checks is not None:
+        row_checks[(sheet_name, row_number)] = record_id
+        return row_number
+    return _verify_row_numbers({(sheet_name, row_number): record_id}).get((sheet_name, row_number))
+
+
+def _verify_row_numbers(row_checks: dict) -> dict:
+    """
+    寫入前確認列號仍指向同一筆記錄。
+
+    一次 batchGet 讀回每個列號的第一欄；有 sheet 不符時（在試算表上手動刪除、
+    排序或插入過列），讓該 sheet 的快取失效、重新讀取後依 ID 重新找列號。
+
+    Args:
+        row_checks: {(sheet 名稱, 列號): 預期的 ID}
+
+    Returns:
+        {(sheet 名稱, 原列號): 正確列號}；ID 已不存在的記錄不會出現在結果中
+    """
+    keys = list(row_checks)
+    response = get_spreadsheet().values_batch_get([f"'{sheet}'!A{row}" for sheet, row in keys])
+    stale = set()
+    for (sheet_name, row_number), value_range in zip(keys, response.get("valueRanges", [])):
+        cells = value_range.get("values") or [[]]
+        current_id = cells[0][0] if cells[0] else ""
+        if current_id != row_checks[(sheet_name, row_number)]:
+            stale.add(sheet_name)
+
+    if stale:
+        invalidate_sheet_cache(*stale)
+        _id_row_map.clear()
+
+    verified = {}
+    for (sheet_name, row_number), record_id in row_checks.items():
+        if sheet_name in stale:
+            actual = _id_row_map(sheet_name).get(record_id)
+            if actual is not None:
+                verified[(sheet_name, row_number)] = actual
+        else:
+            verified[(sheet_name, row_number)] = row_number
+    return verified
+
+
+def _update_row_fields(worksheet, row_number: int, headers: list, updates: dict):
+    """
+    將同一列的多個欄位以一次 batch_update 寫入（取代逐欄 update_cell）。
 
-        st.error(f"找不到帳戶：{bank_id}")
-        return False
+    不在標題列中的欄位會被略過；批次區塊內改為排入佇列，離開區塊時一起寫入。
+    """
+    cell_updates = getattr(_write_batch, "cell_updates", None)
+    if cell_updates is not None:
+        cell_updates.extend(
+            (worksheet.title, row_number, headers.index(key) + 1, value)
+            for key, value in updates.items()
+            if key in headers
+        )
+        return
 
-    except Exception as e:
-        st.error(f"更新銀行帳戶失敗: {e}")
-        return False
+    data = [
+        {
+            "range": gspread.utils.rowcol_to_a1(row_number, headers.index(key) + 1),
+            "values": [[value]]
+        }
+        for key, value in updates.items()
+        if key in headers
+    ]
+    if data:
+        _sheets_write(worksheet.batch_update, data, value_input_option="USER_ENTERED")
 
 
 def update_category(category_id: str, updates: dict) -> bool:
@@ -543,26 +1347,19 @@ def update_category(category_id: str, updates: dict) -> bool:
         return False
 
     try:
-        worksheet = spreadsheet.worksheet(SHEET_CATEGORY)
-        all_data = worksheet.get_all_records()
-        headers = worksheet.row_values(1)
-
         # 找到該 Category_ID 的 row
-        for idx, row in enumerate(all_data):
-            if row.get("Category_ID") == category_id:
-                row_number = idx + 2
-
-                # 更新指定的欄位
-                for key, value in updates.items():
-                    if key in headers:
-                        col_number = headers.index(key) + 1
-                        worksheet.update_cell(row_number, col_number, value)
+        row_number = _find_row_number(SHEET_CATEGORY, category_id)
+        if row_number is None:
+            st.error(f"找不到科目：{category_id}")
+            return False
 
-                st.cache_data.clear()
-                return True
+        # 更新指定的欄位（一次 batch_update）
+        worksheet = _get_worksheet(SHEET_CATEGORY)
+        headers = _sheet_headers(SHEET_CATEGORY)
+        _update_row_fields(worksheet, row_number, headers, updates)
 
-        st.error(f"找不到科目：{category_id}")
-        return False
+        invalidate_sheet_cache(SHEET_CATEGORY)
+        return True
 
     except Exception as e:
         st.error(f"更新科目失敗: {e}")
@@ -585,26 +1382,19 @@ def update_sub_tag(sub_tag_id: str, updates: dict) -> bool:
         return False
 
     try:
-        worksheet = spreadsheet.worksheet(SHEET_SUB_TAG)
-        all_data = worksheet.get_all_records()
-        headers = worksheet.row_values(1)
-
         # 找到該 Sub_Tag_ID 的 row
-        for idx, row in enumerate(all_data):
-            if row.get("Sub_Tag_ID") == sub_tag_id:
-                row_number = idx + 2
-
-                # 更新指定的欄位
-                for key, value in updates.items():
-                    if key in headers:
-                        col_number = headers.index(key) + 1
-                        worksheet.update_cell(row_number, col_number, value)
+        row_number = _find_row_number(SHEET_SUB_TAG, sub_tag_id)
+        if row_number is None:
+            st.error(f"找不到子類：{sub_tag_id}")
+            return False
 
-                st.cache_data.clear()
-                return True
+        # 更新指定的欄位（一次 batch_update）
+        worksheet = _get_worksheet(SHEET_SUB_TAG)
+        headers = _sheet_headers(SHEET_SUB_TAG)
+        _update_row_fields(worksheet, row_number, headers, updates)
 
-        st.error(f"找不到子類：{sub_tag_id}")
-        return False
+        invalidate_sheet_cache(SHEET_SUB_TAG)
+        return True
 
     except Exception as e:
         st.error(f"更新子類失敗: {e}")
@@ -627,29 +1417,24 @@ def update_saving_goal_status(goal_id: str, status: str) -> bool:
         if spreadsheet is None:
             return False
 
-        ws = spreadsheet.worksheet(SHEET_SAVING_GOAL)
-        records = ws.get_all_records()
-
-        for idx, record in enumerate(records):
-            if record.get("Goal_ID") == goal_id:
-                row_num = idx + 2  # +1 for header, +1 for 1-indexed
-
-                # Find Status and Completed_At columns
-                headers = ws.row_values(1)
-                status_col = headers.index("Status") + 1
-
-                ws.update_cell(row_num, status_col, status)
+        # 找到該 Goal_ID 的 row
+        row_number = _find_row_number(SHEET_SAVING_GOAL, goal_id)
+        if row_number is None:
+            st.error(f"找不到目標：{goal_id}")
+            return False
 
-                # Update Completed_At if column exists
-                if "Completed_At" in headers:
-                    completed_col = headers.index("Completed_At") + 1
-                    ws.update_cell(row_num, completed_col, get_taiwan_now().strftime("%Y-%m-%d %H:%M:%S"))
+        # Status 與 Completed_At 一次 batch_update 寫入（沒有 Completed_At 欄時自動略過）
+        updates = {
+            "Status": status,
+            "Completed_At": get_taiwan_now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
 
-                st.cache_data.clear()
-                return True
+        ws = _get_worksheet(SHEET_SAVING_GOAL)
+        headers = _sheet_headers(SHEET_SAVING_GOAL)
+        _update_row_fields(ws, row_number, headers, updates)
 
-        st.error(f"找不到目標：{goal_id}")
-        return False
+        invalidate_sheet_cache(SHEET_SAVING_GOAL)
+        return True
 
     except Exception as e:
         st.error(f"更新目標狀態失敗: {e}")
@@ -678,10 +1463,9 @@ def add_saving_goal(name: str, has_target: bool, target_amount: float = 0,
         if spreadsheet is None:
             return False
 
-        ws = spreadsheet.worksheet(SHEET_SAVING_GOAL)
-
-        # Generate Goal_ID
-        goal_id = f"GOAL{int(get_taiwan_now().timestamp())}"
+        # Generate Goal_ID (ID 與 Created_At 共用同一個時間點)
+        now = get_taiwan_now()
+        goal_id = _make_id("GOAL", now)
 
         # Prepare row data (must match sheet column order)
         # Columns: Goal_ID, Name, Has_Target, Target_Amount, Deadline, Accumulated,
@@ -694,14 +1478,13 @@ def add_saving_goal(name: str, has_target: bool, target_amount: float = 0,
             deadline,
             0,  # Accumulated (calculated from transactions)
             "Active",
-            get_taiwan_now().strftime("%Y-%m-%d %H:%M:%S"),
+            f"{now:%Y-%m-%d %H:%M:%S}",
             "",  # Completed_At
             default_bank_id,
             default_payment_method
         ]
 
-        ws.append_row(new_row, value_input_option="USER_ENTERED")
-        st.cache_data.clear()
+        _append_row(SHEET_SAVING_GOAL, new_row)
         return True
 
     except Exception as e:
@@ -725,19 +1508,18 @@ def update_config(key: str, value) -> bool:
         return False
 
     try:
-        ws = spreadsheet.worksheet(SHEET_CONFIG)
-        records = ws.get_all_records()
-
-        for idx, record in enumerate(records):
-            if record.get("Key") == key:
-                row_num = idx + 2  # +1 for header, +1 for 1-indexed
-                ws.update_cell(row_num, 2, value)  # Column B = Value
-                st.cache_data.clear()
-                return True
-
-        # Key not found
-        st.error(f"找不到設定項目：{key}")
-        return False
+        # 找到該 Key 的 row（Config 第一欄是 Key）
+        row_number = _find_row_number(SHEET_CONFIG, key)
+        if row_number is None:
+            st.error(f"找不到設定項目：{key}")
+            return False
+
+        ws = _get_worksheet(SHEET_CONFIG)
+        headers = _sheet_headers(SHEET_CONFIG)
+        _update_row_fields(ws, row_number, headers, {"Value": value})
+
+        invalidate_sheet_cache(SHEET_CONFIG)
+        return True
 
     except Exception as e:
         st.error(f"更新設定失敗: {e}")
@@ -748,46 +1530,75 @@ def update_config(key: str, value) -> bool:
 # 工具函式
 # =============================================================================
 
-def get_active_period() -> Optional[pd.Series]:
-    """取得當前活躍的 Period"""
+@st.cache_data(ttl=60)
+def _load_active_period_info(today: date) -> dict:
+    """
+    從 load_periods() 一次組出當前週期的資訊（today 作為快取鍵，跨日自動重算）
+
+    Returns:
+        dict: period / period_id / start / end / days_left / is_overdue
+    """
+    info = {
+        "period": None,
+        "period_id": "",
+        "start": None,
+        "end": None,
+        "days_left": 0,
+        "is_overdue": False,
+    }
+
     periods = load_periods()
     if periods.empty:
-        return None
+        return info
 
     active = periods[periods["Status"] == PERIOD_ACTIVE]
     if active.empty:
-        return None
+        return info
 
     # 取最新的一筆
-    return active.iloc[-1]
+    period = active.iloc[-1]
+    start = ensure_date(period["Start_Date"])
+    end = ensure_date(period["End_Date"])
 
+    info.update(period=period, period_id=period["Period_ID"], start=start, end=end)
+    if end is not None:
+        info["days_left"] = max((end - today).days + 1, 0)  # 包含今天
+        info["is_overdue"] = today > end
+    return info
 
-def get_current_period_dates() -> tuple[Optional[date], Optional[date]]:
-    """取得當前週期的起始和結束日期"""
-    period = get_active_period()
-    if period is None:
-        return None, None
 
-    start = ensure_date(period["Start_Date"])
-    end = ensure_date(period["End_Date"])
+def get_active_period_info() -> dict:
+    """取得當前週期資訊（period、起訖日、剩餘天數、是否過期），同一次 rerun 只算一次"""
+    return _load_active_period_info(get_taiwan_today())
+
+
+def get_active_period() -> Optional[pd.Series]:
+    """取得當前活躍的 Period"""
+    return get_active_period_info()["period"]
+
 
-    return start, end
+def get_current_period_dates() -> tuple[Optional[date], Optional[date]]:
+    """取得當前週期的起始和結束日期"""
+    info = get_active_period_info()
+    return info["start"], info["end"]
 
 
 def get_days_left_in_period() -> int:
     """計算本期剩餘天數"""
-    _, period_end = get_current_period_dates()
-    if period_end is None:
+    info = get_active_period_info()
+    if info["end"] is None:
         return 0
+    return max(info["days_left"], 1)
 
-    today = get_taiwan_today()
-    days_left = (period_end - today).days + 1  # 包含今天
-    return max(days_left, 1)
+
+# 金額輸入格式：數字（可含千分位逗號、空白與小數點），可帶正負號
+AMOUNT_PATTERN = re.compile(r"[+-]?(?:\d[\d, ]*)?(?:\.\d*)?")
 
 
+@functools.lru_cache(maxsize=256)
 def parse_amount(value: str) -> float:
     """
-    解析金額輸入，支援千分位逗號
+    解析金額輸入，支援千分位逗號（輸入框的文字每次 rerun 都相同，結果直接快取）
 
     Args:
         value: 使用者輸入的金額字串
@@ -797,14 +1608,16 @@ def parse_amount(value: str) -> float:
     """
     if not value:
         return 0.0
-    try:
-        # 移除千分位逗號和空白
-        cleaned = str(value).replace(",", "").replace(" ", "").strip()
-        return float(cleaned)
-    except (ValueError, TypeError):
+    # 先用 regex 檢查格式：輸入到一半的字串不走例外流程，
+    # 也擋掉 float() 會接受的 nan / inf / 科學記號
+    text = str(value).strip()
+    if not AMOUNT_PATTERN.fullmatch(text) or not any(ch.isdigit() for ch in text):
         return 0.0
+    # 移除千分位逗號和空白
+    return float(text.replace(",", "").replace(" ", ""))
 
 
+@functools.singledispatch
 def ensure_date(value) -> Optional[date]:
     """
     確保值為 date 類型
@@ -815,17 +1628,34 @@ def ensure_date(value) -> Optional[date]:
     Returns:
         date object，若輸入為 None 則回傳 None
     """
+    # 依型別分派（見下方 register），這裡處理 None 與其他有 .date() 的物件（如 NaT）
     if value is None:
         return None
-    if isinstance(value, date) and not isinstance(value, datetime):
-        return value
-    if isinstance(value, str):
-        return pd.to_datetime(value).date()
     if hasattr(value, 'date'):
         return value.date()
     return value
 
 
+@ensure_date.register
+def _(value: date) -> date:
+    return value
+
+
+@ensure_date.register
+def _(value: datetime) -> date:
+    # 也涵蓋 pd.Timestamp（datetime 的子類別）
+    return value.date()
+
+
+@ensure_date.register
+def _(value: str) -> date:
+    # 試算表的日期格式固定，先用明確格式解析；其他格式才交給 pandas 推斷
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        return pd.to_datetime(value).date()
+
+
 def is_has_target(value) -> bool:
     """
     Handle Has_Target field from Google Sheets (may be string or bool)
@@ -863,6 +1693,11 @@ def is_period_overdue(period: pd.Series) -> bool:
 
 def get_period_by_id(period_id: str) -> Optional[pd.Series]:
     """根據 ID 取得週期資料"""
+    # 大多數呼叫查的是當前週期：直接用已快取的結果，不必掃描整張表
+    info = get_active_period_info()
+    if info["period"] is not None and info["period_id"] == period_id:
+        return info["period"]
+
     periods = load_periods()
     if periods.empty:
         return None
@@ -890,6 +1725,51 @@ def get_period_days_left(period: pd.Series) -> int:
 # Living 計算函式
 # =============================================================================
 
+@st.cache_data(ttl=60)
+def get_transaction_totals() -> dict:
+    """
+    交易表各餘額所需的加總，只對整張表做一次 groupby，其餘在小結果表上彙總。
+
+    Returns:
+        {
+            'by_type': {Type: 金額},
+            'transfer_in': {Target_Account: 金額},   # Type='Transfer'
+            'transfer_out': {Account: 金額},         # Type='Transfer'
+            'living_by_period': {Period_ID: 金額},   # Type='Expense' AND Account='Living'
+            'expense_by_period_category': {Period_ID: {Category_ID: 金額}}  # Type='Expense'
+        }
+    """
+    totals = {
+        "by_type": {}, "transfer_in": {}, "transfer_out": {},
+        "living_by_period": {}, "expense_by_period_category": {}
+    }
+    transactions = load_transactions()
+    if transactions.empty:
+        return totals
+
+    sums = transactions.groupby(
+        ["Type", "Account", "Target_Account", "Period_ID"], observed=True
+    )["Amount"].sum().reset_index()
+
+    def _sum_by(df: pd.DataFrame, key: str) -> dict:
+        grouped = df.groupby(key, observed=True)["Amount"].sum()
+        return {k: float(v) for k, v in grouped.items()}
+
+    transfers = sums[sums["Type"] == TYPE_TRANSFER]
+    living = sums[(sums["Type"] == TYPE_EXPENSE) & (sums["Account"] == ACCOUNT_LIVING)]
+    totals["by_type"] = _sum_by(sums, "Type")
+    totals["transfer_in"] = _sum_by(transfers, "Target_Account")
+    totals["transfer_out"] = _sum_by(transfers, "Account")
+    totals["living_by_period"] = _sum_by(living, "Period_ID")
+
+    # 各週期各科目支出：所有週期一次 groupby，切換週期不必重新掃描
+    expenses = transactions[transactions["Type"].eq(TYPE_EXPENSE)]
+    by_category = expenses.groupby(["Period_ID", "Category_ID"], observed=True)["Amount"].sum()
+    for (period_id, category_id), amount in by_category.items():
+        totals["expense_by_period_category"].setdefault(period_id, {})[category_id] = float(amount)
+    return totals
+
+
 def get_living_remaining(period_id: str) -> float:
     """
     計算 Living 本期剩餘
@@ -903,18 +1783,8 @@ def get_living_remaining(period_id: str) -> float:
     if period is None:
         return 0.0
 
-    budget = float(period["Living_Budget"]) if period["Living_Budget"] else 0.0
-
-    transactions = load_transactions()
-    if transactions.empty:
-        return budget
-
-    expenses = transactions[
-        (transactions["Type"] == TYPE_EXPENSE) &
-        (transactions["Account"] == ACCOUNT_LIVING) &
-        (transactions["Period_ID"] == period_id)
-    ]
-    spent = float(expenses["Amount"].sum()) if not expenses.empty else 0.0
+    budget = float(period["Living_Budget"])
+    spent = get_transaction_totals()["living_by_period"].get(period_id, 0.0)
 
     return budget - spent
 
@@ -942,24 +1812,76 @@ def get_daily_available(period_id: str) -> float:
     return remaining / days_left
 
 
-def get_category_spent(category_id: str, period_id: str) -> float:
-    """計算特定科目本期支出"""
+@st.cache_data(ttl=60)
+def get_period_living_expenses(period_id: str) -> pd.DataFrame:
+    """
+    本期 Living 支出明細（Period_ID + Expense + Living）。
+
+    三個條件都是 category 欄位的代碼比對，結果依 period 快取，
+    科目進度與消費紀錄共用，每個快取週期只掃描一次交易表。
+    """
     transactions = load_transactions()
     if transactions.empty:
-        return 0.0
+        return transactions
+
+    mask = (
+        transactions["Period_ID"].eq(period_id) &
+        transactions["Type"].eq(TYPE_EXPENSE) &
+        transactions["Account"].eq(ACCOUNT_LIVING)
+    )
+    return transactions[mask]
+
+
+@st.cache_data(ttl=60)
+def get_recent_living_expenses(period_id: str, limit: int = 20) -> pd.DataFrame:
+    """
+    本期最新 limit 筆 Living 支出。
+
+    交易表載入時已依日期新到舊排序，直接取前 limit 筆即可；
+    快取的只有這幾筆，每次重繪不必複製整份本期明細。
+    """
+    return get_period_living_expenses(period_id).head(limit)
+
+
+def get_category_spent_by_period(period_id: str) -> dict:
+    """本期各科目支出 {Category_ID: 金額}（取自 get_transaction_totals 的分組加總）"""
+    return get_transaction_totals()["expense_by_period_category"].get(period_id, {})
 
-    expenses = transactions[
-        (transactions["Type"] == TYPE_EXPENSE) &
-        (transactions["Category_ID"] == category_id) &
-        (transactions["Period_ID"] == period_id)
-    ]
-    return float(expenses["Amount"].sum()) if not expenses.empty else 0.0
+
+def get_category_spent(category_id: str, period_id: str) -> float:
+    """計算特定科目本期支出"""
+    return float(get_category_spent_by_period(period_id).get(category_id, 0.0))
 
 
 # =============================================================================
 # Saving 計算函式
 # =============================================================================
 
+@st.cache_data(ttl=60)
+def get_saving_balances() -> dict:
+    """
+    所有 Saving 目標/資金池的餘額 {Goal_ID: 餘額}。
+
+    每筆交易依 Type / Account / Target_Account 算出正負號，
+    再依 Goal_ID 一次 groupby 加總（取代每個目標各掃四次交易表）。
+    """
+    transactions = load_transactions()
+    if transactions.empty:
+        return {}
+
+    is_transfer = transactions["Type"].eq(TYPE_TRANSFER).to_numpy()
+    sign = (
+        transactions["Type"].eq(TYPE_SAVING_IN).to_numpy(dtype="float64")
+        - transactions["Type"].eq(TYPE_SAVING_OUT).to_numpy(dtype="float64")
+        - (is_transfer & transactions["Account"].eq(ACCOUNT_SAVING).to_numpy())
+        + (is_transfer & transactions["Target_Account"].eq(ACCOUNT_SAVING).to_numpy())
+    )
+    relevant = sign != 0
+    signed = pd.Series(transactions["Amount"].to_numpy()[relevant] * sign[relevant])
+    totals = signed.groupby(transactions["Goal_ID"].to_numpy()[relevant]).sum()
+    return {goal_id: float(total) for goal_id, total in totals.items()}
+
+
 def get_saving_balance(goal_id: str) -> float:
     """
     Calculate Saving goal/pool balance.
@@ -978,45 +1900,37 @@ def get_saving_balance(goal_id: str) -> float:
     Returns:
         float: Current balance of the saving goal/pool
     """
-    transactions = load_transactions()
-    if transactions.empty:
-        return 0.0
-
-    # Saving_In
-    saving_in = transactions[
-        (transactions["Type"] == TYPE_SAVING_IN) &
-        (transactions["Goal_ID"] == goal_id)
-    ]["Amount"].sum()
+    return float(get_saving_balances().get(goal_id, 0.0))
 
-    # Saving_Out
-    saving_out = transactions[
-        (transactions["Type"] == TYPE_SAVING_OUT) &
-        (transactions["Goal_ID"] == goal_id)
-    ]["Amount"].sum()
 
-    # Transfer_Out (從此 Saving 轉出)
-    transfer_out = transactions[
-        (transactions["Type"] == TYPE_TRANSFER) &
-        (transactions["Account"] == ACCOUNT_SAVING) &
-        (transactions["Goal_ID"] == goal_id)
-    ]["Amount"].sum()
-
-    # Transfer_In (轉入此 Saving)
-    transfer_in = transactions[
-        (transactions["Type"] == TYPE_TRANSFER) &
-        (transactions["Target_Account"] == ACCOUNT_SAVING) &
-        (transactions["Goal_ID"] == goal_id)
-    ]["Amount"].sum()
+@st.cache_data(ttl=60)
+def _saving_transactions_by_goal() -> dict:
+    """
+    Goal_ID → 該目標 Saving_In / Saving_Out / Transfer 交易（依 Timestamp 新到舊）
 
-    return float(saving_in - saving_out - transfer_out + transfer_in)
+    所有目標共用一次掃描；分組與取列用的是同一份 load_transactions() 結果，
+    不會把列位置套到另一份（可能已增減列的）交易表上。
+    """
+    transactions = load_transactions()
+    if transactions.empty:
+        return {}
+    saving = transactions[
+        transactions["Type"].isin([TYPE_SAVING_IN, TYPE_SAVING_OUT, TYPE_TRANSFER])
+    ]
+    return {
+        goal_id: group.sort_values("Timestamp", ascending=False)
+        for goal_id, group in saving.groupby("Goal_ID", observed=True, sort=False)
+    }
 
 
+@st.cache_data(ttl=60)
 def get_saving_transactions(goal_id: str):
     """
     Get all transactions for a Saving goal/pool.
 
     Filters transactions where Goal_ID matches and Type is Saving_In, Saving_Out, or Transfer.
     Returns sorted by Timestamp descending (newest first).
+    Cached per goal; the per-goal frames come from _saving_transactions_by_goal, which scans transactions once for all goals.
 
     Args:
         goal_id: The Goal_ID to filter transactions for
@@ -1024,23 +1938,42 @@ def get_saving_transactions(goal_id: str):
     Returns:
         DataFrame: Filtered and sorted transactions
     """
+    # Filter by Goal_ID and relevant types (including Transfer), already sorted newest first
+    filtered = _saving_transactions_by_goal().get(goal_id)
+    if filtered is None:
+        return load_transactions().iloc[0:0]
+    return filtered
+
+
+@st.cache_data(ttl=60)
+def get_goal_actual_expenses() -> dict:
+    """
+    Goal_ID → 實際支出，供已完成目標顯示
+
+    優先用完成目標時的 Saving_Out（Ref 含 Goal_Complete），沒有則用該目標全部 Saving_Out。
+    只讀 Type / Ref / Goal_ID / Amount 四欄，回傳小 dict，不必把整張交易表複製到畫面端。
+    """
     transactions = load_transactions()
     if transactions.empty:
-        return transactions
-
-    # Filter by Goal_ID and relevant types (including Transfer)
-    filtered = transactions[
-        (transactions["Goal_ID"] == goal_id) &
-        (transactions["Type"].isin([TYPE_SAVING_IN, TYPE_SAVING_OUT, TYPE_TRANSFER]))
-    ].copy()
+        return {}
+    saving_out = transactions.loc[transactions["Type"] == TYPE_SAVING_OUT, ["Goal_ID", "Ref", "Amount"]]
+    is_complete = saving_out["Ref"].str.contains("Goal_Complete", regex=False, na=False)
+    totals = saving_out.groupby("Goal_ID", observed=True)["Amount"].sum()
+    complete = saving_out[is_complete].groupby("Goal_ID", observed=True)["Amount"].sum()
+    return {goal_id: float(total) for goal_id, total in {**totals, **complete}.items()}
 
-    if filtered.empty:
-        return filtered
 
-    # Sort by Timestamp descending (newest first)
-    filtered = filtered.sort_values("Timestamp", ascending=False)
+@st.cache_data(ttl=60, show_spinner=False)
+def get_transactions_csv() -> tuple[bytes, int]:
+    """
+    交易記錄匯出用 CSV（bytes, 筆數），維持 sheet 原始順序
 
-    return filtered
+    序列化整張交易表很花時間，快取到交易有寫入為止，策略頁重繪不必每次重做。
+    """
+    transactions = load_transactions()
+    if transactions.empty:
+        return b"", 0
+    return transactions.sort_index().to_csv(index=False).encode('utf-8-sig'), len(transactions)
 
 
 # =============================================================================
@@ -1061,26 +1994,10 @@ def get_backup_balance() -> float:
     config = load_config()
     initial = float(config.get("Back_Up_Initial", 0) or 0)
 
-    transactions = load_transactions()
-    if transactions.empty:
-        return initial
-
-    # Settlement_Out 扣 Back Up
-    settlement_out = transactions[
-        transactions["Type"] == TYPE_SETTLEMENT_OUT
-    ]["Amount"].sum()
-
-    # Transfer to Back Up
-    transfer_in = transactions[
-        (transactions["Type"] == TYPE_TRANSFER) &
-        (transactions["Target_Account"] == ACCOUNT_BACKUP)
-    ]["Amount"].sum()
-
-    # Transfer from Back Up
-    transfer_out = transactions[
-        (transactions["Type"] == TYPE_TRANSFER) &
-        (transactions["Account"] == ACCOUNT_BACKUP)
-    ]["Amount"].sum()
+    totals = get_transaction_totals()
+    settlement_out = totals["by_type"].get(TYPE_SETTLEMENT_OUT, 0.0)   # Settlement_Out 扣 Back Up
+    transfer_in = totals["transfer_in"].get(ACCOUNT_BACKUP, 0.0)       # Transfer to Back Up
+    transfer_out = totals["transfer_out"].get(ACCOUNT_BACKUP, 0.0)     # Transfer from Back Up
 
     return float(initial - settlement_out + transfer_in - transfer_out)
 
@@ -1098,28 +2015,49 @@ def get_free_fund_balance() -> float:
     config = load_config()
     initial = float(config.get("Free_Fund_Initial", 0) or 0)
 
-    transactions = load_transactions()
-    if transactions.empty:
-        return initial
+    totals = get_transaction_totals()
+    settlement_in = totals["by_type"].get(TYPE_SETTLEMENT_IN, 0.0)     # Settlement_In 進 Free Fund
+    transfer_in = totals["transfer_in"].get(ACCOUNT_FREEFUND, 0.0)     # Transfer to Free Fund
+    transfer_out = totals["transfer_out"].get(ACCOUNT_FREEFUND, 0.0)   # Transfer from Free Fund
 
-    # Settlement_In 進 Free Fund
-    settlement_in = transactions[
-        transactions["Type"] == TYPE_SETTLEMENT_IN
-    ]["Amount"].sum()
+    return float(initial + settlement_in + transfer_in - transfer_out)
 
-    # Transfer to Free Fund
-    transfer_in = transactions[
-        (transactions["Type"] == TYPE_TRANSFER) &
-        (transactions["Target_Account"] == ACCOUNT_FREEFUND)
-    ]["Amount"].sum()
 
-    # Transfer from Free Fund
-    transfer_out = transactions[
-        (transactions["Type"] == TYPE_TRANSFER) &
-        (transactions["Account"] == ACCOUNT_FREEFUND)
-    ]["Amount"].sum()
+def get_account_balance(account: str, goal_id: str = "") -> float:
+    """轉帳來源帳戶的目前餘額（Saving 依 goal_id 計算個別目標）"""
+    if account == ACCOUNT_FREEFUND:
+        return get_free_fund_balance()
+    if account == ACCOUNT_BACKUP:
+        return get_backup_balance()
+    if account == ACCOUNT_SAVING:
+        return get_saving_balance(goal_id)
+    return 0.0
 
-    return float(initial + settlement_in + transfer_in - transfer_out)
+
+@st.cache_resource
+def _transfer_lock() -> threading.Lock:
+    """轉帳「確認餘額 → 寫入」的臨界區（所有 session 共用）"""
+    return threading.Lock()
+
+
+@contextmanager
+def reserve_balance(account: str, goal_id: str, amount: float):
+    """
+    保守式餘額檢查：持鎖重新讀取 Transaction，以最新資料重算來源餘額，
+    足夠才執行區塊內的寫入；其他 session 的轉帳在鎖外等候，不會同時扣同一筆餘額。
+
+    畫面上顯示的餘額來自快取，可能落後其他裝置的寫入，不能作為最後依據。
+    Sheets 沒有條件式寫入，多台主機同時轉帳仍無法完全排除。
+
+    Raises:
+        ValueError: 最新餘額不足（訊息含最新可用餘額）
+    """
+    with _transfer_lock():
+        invalidate_sheet_cache(SHEET_TRANSACTION)
+        balance = get_account_balance(account, goal_id)
+        if amount > balance:
+            raise ValueError(f"餘額不足（最新可用：${balance:,.0f}）")
+        yield balance
 
 
 # =============================================================================
@@ -1129,26 +2067,20 @@ def get_free_fund_balance() -> float:
 def update_period_status(period_id: str, status: str, settled_at: str = "") -> bool:
     """更新週期狀態"""
     try:
-        sheet = get_spreadsheet().worksheet(SHEET_PERIOD)
-        records = sheet.get_all_records()
-
-        for idx, record in enumerate(records):
-            if record.get("Period_ID") == period_id:
-                row_num = idx + 2  # 標題列 + 1-indexed
+        row_number = _find_row_number(SHEET_PERIOD, period_id)
+        if row_number is None:
+            return False
 
-                # 找到 Status 欄位位置
-                headers = sheet.row_values(1)
-                status_col = headers.index("Status") + 1
-                sheet.update_cell(row_num, status_col, status)
+        # Status 與 Settled_At 一次 batch_update 寫入
+        updates = {"Status": status}
+        if settled_at:
+            updates["Settled_At"] = settled_at
 
-                # 更新 Settled_At
-                if settled_at and "Settled_At" in headers:
-                    settled_col = headers.index("Settled_At") + 1
-                    sheet.update_cell(row_num, settled_col, settled_at)
+        sheet = _get_worksheet(SHEET_PERIOD)
+        _update_row_fields(sheet, row_number, _sheet_headers(SHEET_PERIOD), updates)
 
-                st.cache_data.clear()
-                return True
-        return False
+        invalidate_sheet_cache(SHEET_PERIOD)
+        return True
     except Exception as e:
         st.error(f"更新週期狀態失敗：{e}")
         return False
@@ -1182,64 +2114,55 @@ def settle_period(period_id: str) -> dict:
             return {'success': False, 'net_result': 0, 'settlement_id': '', 'message': '此週期已結算'}
 
         # 計算結果
-        budget = float(period["Living_Budget"]) if period["Living_Budget"] else 0.0
-        transactions = load_transactions()
-
-        if transactions.empty:
-            total_expense = 0.0
-        else:
-            expenses = transactions[
-                (transactions["Type"] == TYPE_EXPENSE) &
-                (transactions["Account"] == ACCOUNT_LIVING) &
-                (transactions["Period_ID"] == period_id)
-            ]
-            total_expense = float(expenses["Amount"].sum()) if not expenses.empty else 0.0
+        budget = float(period["Living_Budget"])
+        # 直接取用快取的分組加總，不再對整張交易表組過濾條件
+        total_expense = get_transaction_totals()["living_by_period"].get(period_id, 0.0)
 
         net_result = budget - total_expense
 
         # 產生結算交易
         now = get_taiwan_now()
-        settlement_id = f"STL{now.strftime('%Y%m%d%H%M%S')}"
-
-        if net_result > 0:
-            # 結餘進 Free Fund
-            add_transaction(
-                trans_type=TYPE_SETTLEMENT_IN,
-                amount=net_result,
-                account=ACCOUNT_FREEFUND,
-                note="週期結算結餘",
-                ref=period_id
-            )
-            impact_account = ACCOUNT_FREEFUND
-        elif net_result < 0:
-            # 超支扣 Back Up
-            add_transaction(
-                trans_type=TYPE_SETTLEMENT_OUT,
-                amount=abs(net_result),
-                account=ACCOUNT_BACKUP,
-                note="週期結算超支",
-                ref=period_id
-            )
-            impact_account = ACCOUNT_BACKUP
-        else:
-            impact_account = ""
-
-        # 寫入 Settlement_Log
-        sheet = get_spreadsheet().worksheet(SHEET_SETTLEMENT_LOG)
-        sheet.append_row([
-            settlement_id,
-            period_id,
-            budget,
-            total_expense,
-            net_result,
-            impact_account,
-            now.strftime("%Y-%m-%d %H:%M:%S")
-        ], value_input_option="USER_ENTERED")
+        settled_at = now.strftime("%Y-%m-%d %H:%M:%S")
+        settlement_id = _make_id("STL", now)
 
-        # 更新 Period 狀態
-        update_period_status(period_id, PERIOD_SETTLED, now.strftime("%Y-%m-%d %H:%M:%S"))
-
-        st.cache_data.clear()
+        # 結算交易、Settlement_Log 與 Period 狀態排入同一批次，一次 batchUpdate 寫入
+        with batch_writes():
+            if net_result > 0:
+                # 結餘進 Free Fund
+                add_transaction(
+                    trans_type=TYPE_SETTLEMENT_IN,
+                    amount=net_result,
+                    account=ACCOUNT_FREEFUND,
+                    note="週期結算結餘",
+                    ref=period_id
+                )
+                impact_account = ACCOUNT_FREEFUND
+            elif net_result < 0:
+                # 超支扣 Back Up
+                add_transaction(
+                    trans_type=TYPE_SETTLEMENT_OUT,
+                    amount=abs(net_result),
+                    account=ACCOUNT_BACKUP,
+                    note="週期結算超支",
+                    ref=period_id
+                )
+                impact_account = ACCOUNT_BACKUP
+            else:
+                impact_account = ""
+
+            # 寫入 Settlement_Log
+            _append_row(SHEET_SETTLEMENT_LOG, [
+                settlement_id,
+                period_id,
+                budget,
+                total_expense,
+                net_result,
+                impact_account,
+                settled_at
+            ])
+
+            # 更新 Period 狀態
+            update_period_status(period_id, PERIOD_SETTLED, settled_at)
 
         return {
             'success': True,
@@ -1252,9 +2175,10 @@ def settle_period(period_id: str) -> dict:
         return {'success': False, 'net_result': 0, 'settlement_id': '', 'message': f'結算失敗：{str(e)}'}
 
 
+@st.cache_data(ttl=60)
 def get_wallet_balance() -> float:
     """
-    計算錢包餘額
+    計算錢包餘額（快取：一次重繪中多處呼叫只算一次，Wallet_Log 寫入後失效）
 
     公式：Income - Allocate_Out + Transfer_In + Adjustment
     """
@@ -1262,12 +2186,34 @@ def get_wallet_balance() -> float:
     if logs.empty:
         return 0.0
 
-    income = logs[logs["Type"] == WALLET_INCOME]["Amount"].sum()
-    allocate_out = logs[logs["Type"] == WALLET_ALLOCATE_OUT]["Amount"].sum()
-    transfer_in = logs[logs["Type"] == WALLET_TRANSFER_IN]["Amount"].sum()
-    adjustment = logs[logs["Type"] == WALLET_ADJUSTMENT]["Amount"].sum()
+    # SignedAmount 在載入時已依 Type 帶正負號（見 WALLET_SIGNS）
+    return float(logs["SignedAmount"].sum())
+
+
+def _build_defaults_map(df: pd.DataFrame, id_col: str) -> dict:
+    """ID → {'bank_id', 'payment_method'} 對照表（欄位不存在時為空字串，重複 ID 取第一筆）"""
+    if df.empty or id_col not in df.columns:
+        return {}
+
+    df = df.drop_duplicates(id_col)
+    banks = df["Default_Bank_ID"].astype(str) if "Default_Bank_ID" in df.columns else [""] * len(df)
+    methods = df["Default_Payment_Method"].astype(str) if "Default_Payment_Method" in df.columns else [""] * len(df)
+    return {
+        record_id: {'bank_id': bank_id, 'payment_method': method}
+        for record_id, bank_id, method in zip(df[id_col], banks, methods)
+    }
+
+
+@st.cache_data(ttl=60)
+def get_category_defaults_map() -> dict:
+    """Category_ID → 預設銀行帳戶 / 付款方式"""
+    return _build_defaults_map(load_categories(), "Category_ID")
+
 
-    return float(income - allocate_out + transfer_in + adjustment)
+@st.cache_data(ttl=60)
+def get_sub_tag_defaults_map() -> dict:
+    """Sub_Tag_ID → 預設銀行帳戶 / 付款方式"""
+    return _build_defaults_map(load_sub_tags(), "Sub_Tag_ID")
 
 
 def get_defaults_for_expense(category_id: str, sub_tag_id: str = "") -> dict:
@@ -1285,35 +2231,85 @@ def get_defaults_for_expense(category_id: str, sub_tag_id: str = "") -> dict:
             'payment_method': str  # 'Credit' or 'Direct' or ''
         }
     """
-    categories = load_categories()
-    sub_tags = load_sub_tags()
-
     result = {'bank_id': '', 'payment_method': ''}
 
     # Get category defaults
-    if not categories.empty and 'Category_ID' in categories.columns:
-        cat = categories[categories['Category_ID'] == category_id]
-        if not cat.empty:
-            cat_row = cat.iloc[0]
-            # Handle edge case: columns might not exist
-            if 'Default_Bank_ID' in cat_row:
-                result['bank_id'] = str(cat_row.get('Default_Bank_ID', '') or '')
-            if 'Default_Payment_Method' in cat_row:
-                result['payment_method'] = str(cat_row.get('Default_Payment_Method', '') or '')
+    cat_defaults = get_category_defaults_map().get(category_id)
+    if cat_defaults:
+        result.update(cat_defaults)
 
     # Override with sub_tag defaults if available
-    if sub_tag_id and not sub_tags.empty and 'Sub_Tag_ID' in sub_tags.columns:
-        sub = sub_tags[sub_tags['Sub_Tag_ID'] == sub_tag_id]
-        if not sub.empty:
-            sub_row = sub.iloc[0]
-            if 'Default_Bank_ID' in sub_row and sub_row.get('Default_Bank_ID'):
-                result['bank_id'] = str(sub_row['Default_Bank_ID'])
-            if 'Default_Payment_Method' in sub_row and sub_row.get('Default_Payment_Method'):
-                result['payment_method'] = str(sub_row['Default_Payment_Method'])
+    if sub_tag_id:
+        sub_defaults = get_sub_tag_defaults_map().get(sub_tag_id)
+        if sub_defaults:
+            if sub_defaults['bank_id']:
+                result['bank_id'] = sub_defaults['bank_id']
+            if sub_defaults['payment_method']:
+                result['payment_method'] = sub_defaults['payment_method']
 
     return result
 
 
+# =============================================================================
+# 儀表板彙總
+# =============================================================================
+
+@st.cache_data(ttl=60)
+def compute_dashboard_state(period_id: str = "") -> dict:
+    """
+    一次計算記帳頁狀態總覽所需的所有數值
+
+    wallet_log 與 transactions 各只掃描一次（交易加總共用 get_transaction_totals），
+    餘額沿用 get_wallet_balance / get_backup_balance / get_free_fund_balance，
+    取代分別呼叫 get_living_remaining / get_daily_available / get_period_days_left
+
+    Args:
+        period_id: 當前週期 ID（無週期時傳空字串）
+
+    Returns:
+        {
+            'wallet': float,
+            'backup': float,
+            'free_fund': float,
+            'living_budget': float,
+            'living_spent': float,
+            'living_remaining': float,
+            'days_left': int,
+            'daily_available': float
+        }
+    """
+    # 三個餘額各只有一份公式（見各 get_*_balance），底層的加總都已快取
+    wallet = get_wallet_balance()
+    backup = get_backup_balance()
+    free_fund = get_free_fund_balance()
+
+    totals = get_transaction_totals()
+    living_spent = totals["living_by_period"].get(period_id, 0.0) if period_id else 0.0
+
+    # Living 剩餘與今日可用
+    living_budget = 0.0
+    days_left = 0
+    period = get_period_by_id(period_id) if period_id else None
+    if period is not None:
+        living_budget = float(period["Living_Budget"])
+        days_left = get_period_days_left(period)
+
+    living_remaining = living_budget - living_spent
+    # 避免除以零，若剩餘天數為 0 則回傳全部剩餘
+    daily_available = living_remaining / days_left if days_left > 0 else living_remaining
+
+    return {
+        'wallet': wallet,
+        'backup': backup,
+        'free_fund': free_fund,
+        'living_budget': living_budget,
+        'living_spent': living_spent,
+        'living_remaining': living_remaining,
+        'days_left': days_left,
+        'daily_available': daily_available
+    }
+
+
 # =============================================================================
 # 週期儀式 (Period Ritual)
 # =============================================================================
@@ -1332,6 +2328,20 @@ def end_ritual():
     st.session_state.ritual_data = {}
 
 
+def _ritual_balances() -> dict:
+    """
+    儀式各步驟顯示的帳戶餘額（wallet / free_fund / backup）。
+
+    與記帳頁共用同一份 compute_dashboard_state 快取，一次查詢取得三個餘額。
+    """
+    return compute_dashboard_state(get_active_period_info()["period_id"])
+
+
+def _category_budgets(categories: pd.DataFrame) -> list:
+    """各科目預算（float list，與 categories 列順序相同；Budget 欄由 load_categories 保證存在）"""
+    return categories["Budget"].astype("float64").tolist()
+
+
 def render_ritual_step1():
     """Step 1: 結算上期"""
     st.markdown("### 💫 週期儀式 — Step 1/4")
@@ -1365,7 +2375,7 @@ def render_ritual_step1():
         st.warning(f"⚠️ 目前週期尚未結束（剩餘 {days_left} 天），確定要提前結算嗎？")
 
     # 顯示各科目結算明細
-    budget = float(period["Living_Budget"]) if period["Living_Budget"] else 0
+    budget = float(period["Living_Budget"])
     categories = load_categories()
 
     st.markdown("##### 各科目支出明細")
@@ -1373,11 +2383,11 @@ def render_ritual_step1():
     total_spent = 0
     if not categories.empty and "Status" in categories.columns:
         active_cats = categories[categories["Status"] == "Active"]
-        for _, cat in active_cats.iterrows():
-            cat_id = cat["Category_ID"]
-            cat_name = cat["Name"]
-            cat_budget = float(cat.get("Budget", 0) or 0)
-            spent = get_category_spent(cat_id, period_id)
+        spent_by_cat = get_category_spent_by_period(period_id)
+        for cat_id, cat_name, cat_budget in zip(
+            active_cats["Category_ID"], active_cats["Name"], _category_budgets(active_cats)
+        ):
+            spent = float(spent_by_cat.get(cat_id, 0.0))
             total_spent += spent
 
             col1, col2, col3 = st.columns(3)
@@ -1432,27 +2442,15 @@ def render_ritual_step1():
             else:
                 st.error(result["message"])
 
-
-def render_ritual_step2():
-    """Step 2: 設定新週期"""
-    st.markdown("### 💫 週期儀式 — Step 2/4")
-    st.markdown("#### 📍 設定新週期")
-
-    # UX-2: 顯示目前可用資金
-    wallet_balance = get_wallet_balance()
-    free_fund = get_free_fund_balance()
-    backup = get_backup_balance()
-
-    st.markdown("##### 💰 目前可用資金")
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        st.metric("錢包", f"${wallet_balance:,.0f}")
-    with col2:
-        st.metric("Free Fund", f"${free_fund:,.0f}")
-    with col3:
-        st.metric("Back Up", f"${backup:,.0f}")
-    st.divider()
-
+
+@st.fragment
+def _render_ritual_dates():
+    """
+    Step 2 的日期區塊（開始 / 結束日期與快捷按鈕）。
+
+    以 fragment 執行：調整日期只重繪這一塊，不重算上方的帳戶餘額；
+    選擇結果寫入 st.session_state.ritual_data。
+    """
     today = get_taiwan_today()
 
     # UX-1: 開始日期可編輯
@@ -1468,21 +2466,18 @@ def render_ritual_step2():
     # 結束日期
     default_end = start_date + timedelta(days=30)
 
-    # 快捷按鈕
+    # 快捷按鈕（下方的結束日期欄位緊接著讀取新值，不必再 rerun）
     st.caption("快速選擇結束日期：")
     col1, col2, col3 = st.columns(3)
     with col1:
         if st.button("一個月後", use_container_width=True):
             st.session_state.ritual_data["end_date"] = start_date + timedelta(days=30)
-            st.rerun()
     with col2:
         if st.button("兩週後", use_container_width=True):
             st.session_state.ritual_data["end_date"] = start_date + timedelta(days=14)
-            st.rerun()
     with col3:
         if st.button("一週後", use_container_width=True):
             st.session_state.ritual_data["end_date"] = start_date + timedelta(days=7)
-            st.rerun()
 
     # 手動選擇
     saved_end = st.session_state.ritual_data.get("end_date", default_end)
@@ -1496,6 +2491,30 @@ def render_ritual_step2():
     days_count = (end_date - start_date).days + 1
     st.caption(f"週期長度：{days_count} 天")
 
+
+def render_ritual_step2():
+    """Step 2: 設定新週期"""
+    st.markdown("### 💫 週期儀式 — Step 2/4")
+    st.markdown("#### 📍 設定新週期")
+
+    # UX-2: 顯示目前可用資金
+    balances = _ritual_balances()
+    wallet_balance = balances["wallet"]
+    free_fund = balances["free_fund"]
+    backup = balances["backup"]
+
+    st.markdown("##### 💰 目前可用資金")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("錢包", f"${wallet_balance:,.0f}")
+    with col2:
+        st.metric("Free Fund", f"${free_fund:,.0f}")
+    with col3:
+        st.metric("Back Up", f"${backup:,.0f}")
+    st.divider()
+
+    _render_ritual_dates()
+
     st.divider()
 
     col1, col2 = st.columns(2)
@@ -1515,9 +2534,10 @@ def render_ritual_step3():
     st.markdown("#### 📍 審視信封架構")
 
     # UX-2: 顯示目前可用資金
-    wallet_balance = get_wallet_balance()
-    free_fund = get_free_fund_balance()
-    backup = get_backup_balance()
+    balances = _ritual_balances()
+    wallet_balance = balances["wallet"]
+    free_fund = balances["free_fund"]
+    backup = balances["backup"]
 
     st.markdown("##### 💰 目前可用資金")
     col1, col2, col3 = st.columns(3)
@@ -1567,18 +2587,14 @@ def render_ritual_step3():
 
     # 初始化預算資料
     if "category_budgets" not in st.session_state.ritual_data:
-        st.session_state.ritual_data["category_budgets"] = {}
-        for _, cat in active_cats.iterrows():
-            cat_id = cat["Category_ID"]
-            default_budget = float(cat.get("Budget", 0) or 0)
-            st.session_state.ritual_data["category_budgets"][cat_id] = default_budget
+        st.session_state.ritual_data["category_budgets"] = dict(
+            zip(active_cats["Category_ID"], _category_budgets(active_cats))
+        )
 
     # 顯示各科目預算輸入
     total_living_budget = 0
 
-    for _, cat in active_cats.iterrows():
-        cat_id = cat["Category_ID"]
-        cat_name = cat["Name"]
+    for cat_id, cat_name in zip(active_cats["Category_ID"], active_cats["Name"]):
         current_budget = st.session_state.ritual_data["category_budgets"].get(cat_id, 0)
 
         col1, col2 = st.columns([2, 3])
@@ -1625,9 +2641,10 @@ def render_ritual_step4():
     st.markdown("#### 📍 分配資金")
 
     # 顯示目前餘額
-    wallet_balance = get_wallet_balance()
-    free_fund_balance = get_free_fund_balance()
-    backup_balance = get_backup_balance()
+    balances = _ritual_balances()
+    wallet_balance = balances["wallet"]
+    free_fund_balance = balances["free_fund"]
+    backup_balance = balances["backup"]
 
     st.markdown("##### 目前帳戶餘額")
     col1, col2, col3 = st.columns(3)
@@ -1649,27 +2666,37 @@ def render_ritual_step4():
         transfer_amount = parse_amount(transfer_amount_text)
 
         if st.button("轉帳到錢包", use_container_width=True):
+            # 頁面不會關閉，內容不變再按一次視為重複送出；要再轉一筆相同金額請改內容
+            submission_id = _submission_id("ritual_transfer", (transfer_source, transfer_amount))
             if transfer_amount <= 0:
                 st.error("請輸入有效金額")
+            elif _is_duplicate_submission(submission_id):
+                st.warning("這筆轉帳已經送出過了")
             else:
-                # 寫入 Transfer 交易
                 source_account = ACCOUNT_FREEFUND if transfer_source == "Free Fund" else ACCOUNT_BACKUP
-                add_transaction(
-                    trans_type=TYPE_TRANSFER,
-                    amount=transfer_amount,
-                    account=source_account,
-                    target_account=ACCOUNT_WALLET,
-                    note="週期儀式轉帳"
-                )
-                # 寫入 Wallet_Log
-                add_wallet_log(
-                    WALLET_TRANSFER_IN,
-                    transfer_amount,
-                    note=f"從 {transfer_source} 轉入"
-                )
-                st.cache_data.clear()
-                st.session_state["show_toast"] = f"已從 {transfer_source} 轉入 ${transfer_amount:,.0f}"
-                st.rerun()
+                try:
+                    # Transaction 與 Wallet_Log 一次寫入
+                    with batch_writes():
+                        # 寫入 Transfer 交易
+                        add_transaction(
+                            trans_type=TYPE_TRANSFER,
+                            amount=transfer_amount,
+                            account=source_account,
+                            target_account=ACCOUNT_WALLET,
+                            note="週期儀式轉帳",
+                            submission_id=submission_id
+                        )
+                        # 寫入 Wallet_Log
+                        add_wallet_log(
+                            WALLET_TRANSFER_IN,
+                            transfer_amount,
+                            note=f"從 {transfer_source} 轉入"
+                        )
+                except Exception as e:
+                    st.error(f"轉帳失敗: {e}")
+                else:
+                    st.session_state["show_toast"] = f"已從 {transfer_source} 轉入 ${transfer_amount:,.0f}"
+                    st.rerun()
 
     st.divider()
 
@@ -1690,9 +2717,9 @@ def render_ritual_step4():
     if not saving_goals.empty and "Status" in saving_goals.columns:
         active_goals = saving_goals[saving_goals["Status"] == "Active"]
         if not active_goals.empty:
-            for _, goal in active_goals.iterrows():
-                goal_id = goal["Goal_ID"] if "Goal_ID" in goal else goal.get("Saving_Goal_ID", "")
-                goal_name = goal["Name"]
+            id_col = "Goal_ID" if "Goal_ID" in active_goals.columns else "Saving_Goal_ID"
+            goal_ids = active_goals[id_col] if id_col in active_goals.columns else [""] * len(active_goals)
+            for goal_id, goal_name in zip(goal_ids, active_goals["Name"]):
 
                 col1, col2 = st.columns([2, 3])
                 with col1:
@@ -1733,8 +2760,6 @@ def render_ritual_step4():
 
     # 分配總覽
     total_allocation = living_budget + total_saving + backup_alloc
-    # 重新獲取最新錢包餘額
-    wallet_balance = get_wallet_balance()
     wallet_remaining = wallet_balance - total_allocation
 
     st.markdown("### 分配總覽")
@@ -1788,85 +2813,91 @@ def complete_ritual():
         end_date = data["end_date"]
         living_budget = data["living_budget"]
 
-        period_id = add_period(start_date, end_date, living_budget)
-        if not period_id:
-            st.error("建立週期失敗")
-            return
+        # 步驟 1-6 的新增列與科目預算修改集中成批次，離開區塊時一次寫入所有 sheet
+        with batch_writes():
+            period_id = add_period(start_date, end_date, living_budget)
+            if not period_id:
+                st.error("建立週期失敗")
+                return
 
-        # 2. 寫入 Wallet_Log - Living 分配
-        add_wallet_log(
-            WALLET_ALLOCATE_OUT,
-            living_budget,
-            note="Living 分配",
-            ref=period_id
-        )
+            # 2. 寫入 Wallet_Log - Living 分配
+            add_wallet_log(
+                WALLET_ALLOCATE_OUT,
+                living_budget,
+                note="Living 分配",
+                ref=period_id
+            )
+
+            # 3. 寫入 Wallet_Log 和 Transaction - Saving 分配
+            saving_allocations = data.get("saving_allocations", {})
+            for goal_id, amount in saving_allocations.items():
+                if amount > 0:
+                    # Wallet_Log
+                    add_wallet_log(
+                        WALLET_ALLOCATE_OUT,
+                        amount,
+                        note="Saving 分配",
+                        ref=goal_id
+                    )
+                    # Transaction (Saving_In)
+                    add_transaction(
+                        trans_type=TYPE_SAVING_IN,
+                        amount=amount,
+                        account=ACCOUNT_SAVING,
+                        goal_id=goal_id,
+                        note="週期儀式分配",
+                        period_id=period_id
+                    )
 
-        # 3. 寫入 Wallet_Log 和 Transaction - Saving 分配
-        saving_allocations = data.get("saving_allocations", {})
-        for goal_id, amount in saving_allocations.items():
-            if amount > 0:
-                # Wallet_Log
+            # 4. 寫入 Wallet_Log 和 Transaction - Back Up 分配
+            backup_alloc = data.get("backup_allocation", 0)
+            if backup_alloc > 0:
                 add_wallet_log(
                     WALLET_ALLOCATE_OUT,
-                    amount,
-                    note="Saving 分配",
-                    ref=goal_id
+                    backup_alloc,
+                    note="Back Up 分配",
+                    ref="Back_Up"
                 )
-                # Transaction (Saving_In)
+                # 寫入 Transfer 交易記錄 Back Up 補血
                 add_transaction(
-                    trans_type=TYPE_SAVING_IN,
-                    amount=amount,
-                    account=ACCOUNT_SAVING,
-                    goal_id=goal_id,
-                    note="週期儀式分配",
+                    trans_type=TYPE_TRANSFER,
+                    amount=backup_alloc,
+                    account=ACCOUNT_WALLET,
+                    target_account=ACCOUNT_BACKUP,
+                    note="週期儀式 Back Up 補血",
                     period_id=period_id
                 )
 
-        # 4. 寫入 Wallet_Log 和 Transaction - Back Up 分配
-        backup_alloc = data.get("backup_allocation", 0)
-        if backup_alloc > 0:
-            add_wallet_log(
-                WALLET_ALLOCATE_OUT,
-                backup_alloc,
-                note="Back Up 分配",
-                ref="Back_Up"
-            )
-            # 寫入 Transfer 交易記錄 Back Up 補血
-            add_transaction(
-                trans_type=TYPE_TRANSFER,
-                amount=backup_alloc,
-                account=ACCOUNT_WALLET,
-                target_account=ACCOUNT_BACKUP,
-                note="週期儀式 Back Up 補血",
-                period_id=period_id
-            )
+            # 5. 處理未分配餘額 - 轉入 Free Fund
+            wallet_remaining = data.get("wallet_remaining", 0)
+            if wallet_remaining > 0:
+                # 寫入 Wallet_Log - 未分配餘額轉出
+                add_wallet_log(
+                    WALLET_ALLOCATE_OUT,
+                    wallet_remaining,
+                    note="未分配餘額轉入 Free Fund",
+                    ref=period_id
+                )
+                # 寫入 Settlement_In 交易
+                add_transaction(
+                    trans_type=TYPE_SETTLEMENT_IN,
+                    amount=wallet_remaining,
+                    account=ACCOUNT_FREEFUND,
+                    note="週期儀式未分配餘額",
+                    period_id=period_id
+                )
 
-        # 5. 處理未分配餘額 - 轉入 Free Fund
-        wallet_remaining = data.get("wallet_remaining", 0)
-        if wallet_remaining > 0:
-            # 寫入 Wallet_Log - 未分配餘額轉出
-            add_wallet_log(
-                WALLET_ALLOCATE_OUT,
-                wallet_remaining,
-                note="未分配餘額轉入 Free Fund",
-                ref=period_id
-            )
-            # 寫入 Settlement_In 交易
-            add_transaction(
-                trans_type=TYPE_SETTLEMENT_IN,
-                amount=wallet_remaining,
-                account=ACCOUNT_FREEFUND,
-                note="週期儀式未分配餘額",
-                period_id=period_id
+            # 6. 更新科目預算（只寫入有變更的科目）
+            categories = load_categories()
+            current_budgets = (
+                dict(zip(categories["Category_ID"], _category_budgets(categories)))
+                if "Category_ID" in categories.columns else {}
             )
-
-        # 6. 更新科目預算（如果有變更）
-        category_budgets = data.get("category_budgets", {})
-        for cat_id, budget in category_budgets.items():
-            update_category(cat_id, {"Budget": budget})
+            for cat_id, budget in data.get("category_budgets", {}).items():
+                if current_budgets.get(cat_id) != float(budget):
+                    update_category(cat_id, {"Budget": budget})
 
         # 7. 清理並結束儀式
-        st.cache_data.clear()
         st.session_state["show_toast"] = "✨ 週期儀式完成！新週期已開始"
         end_ritual()
         st.rerun()
@@ -1897,45 +2928,64 @@ def render_ritual():
 # UI 元件 - Dialogs
 # =============================================================================
 
+def _submission_id(form_key: str, payload: tuple) -> str:
+    """
+    表單送出識別碼（傳給 add_transaction 去重）。
+
+    以相同內容重複送出（連點、重跑）時沿用同一個識別碼；內容改變，
+    或開啟對話框時由 _reset_submission_id 清除後，才產生新的識別碼。
+    """
+    key = f"_submission_{form_key}"
+    saved = st.session_state.get(key)
+    if saved is None or saved[0] != payload:
+        saved = (payload, _make_id("SUB"))
+        st.session_state[key] = saved
+    return saved[1]
+
+
+def _reset_submission_id(form_key: str):
+    """開啟對話框時清除上一次的識別碼：重新開啟後送出相同內容視為新的一筆"""
+    st.session_state.pop(f"_submission_{form_key}", None)
+
+
 @st.dialog("收入入帳")
 def dialog_income():
     """收入入帳 Dialog"""
-    # 金額輸入
-    amount_text = st.text_input("金額 *", placeholder="輸入金額")
-
-    # 銀行帳戶選擇
-    bank_accounts = load_bank_accounts()
-    bank_options = ["（不指定）"]
-    bank_id_map = {"（不指定）": ""}
+    # 輸入欄位包在 form 內：打字不會觸發重跑，按下按鈕才送出一次
+    with st.form("income_form", border=False):
+        # 金額輸入
+        amount_text = st.text_input("金額 *", placeholder="輸入金額")
 
-    if not bank_accounts.empty:
-        active_banks = bank_accounts[bank_accounts["Status"] == "Active"]
-        for _, bank in active_banks.iterrows():
-            bank_options.append(bank["Name"])
-            bank_id_map[bank["Name"]] = bank["Bank_ID"]
+        # 銀行帳戶選擇
+        bank_names, bank_ids, _ = get_active_bank_choices()
+        bank_options = ["（不指定）"] + bank_names
+        bank_id_map = {"（不指定）": "", **dict(zip(bank_names, bank_ids))}
 
-    selected_bank = st.selectbox("銀行帳戶", bank_options)
-    bank_id = bank_id_map.get(selected_bank, "")
+        selected_bank = st.selectbox("銀行帳戶", bank_options)
+        bank_id = bank_id_map.get(selected_bank, "")
 
-    # 備註
-    note = st.text_input("備註（選填）")
+        # 備註
+        note = st.text_input("備註（選填）")
 
-    st.divider()
+        st.divider()
 
-    # 按鈕
-    col1, col2 = st.columns(2)
-    with col1:
-        if st.button("取消", use_container_width=True):
-            st.rerun()
-    with col2:
-        if st.button("確認入帳", type="primary", use_container_width=True):
-            amount = parse_amount(amount_text)
-            if amount <= 0:
-                st.error("請輸入有效金額")
-            else:
-                if add_wallet_log(WALLET_INCOME, amount, bank_id, note):
-                    st.session_state["show_toast"] = f"已入帳 ${amount:,.0f}"
-                    st.rerun()
+        # 按鈕
+        col1, col2 = st.columns(2)
+        # 主要按鈕先宣告：表單內按 Enter 時送出的是第一個送出按鈕
+        with col2:
+            submitted = st.form_submit_button("確認入帳", type="primary", use_container_width=True)
+        with col1:
+            if st.form_submit_button("取消", use_container_width=True):
+                st.rerun()
+        with col2:
+            if submitted:
+                amount = parse_amount(amount_text)
+                if amount <= 0:
+                    st.error("請輸入有效金額")
+                else:
+                    if add_wallet_log(WALLET_INCOME, amount, bank_id, note):
+                        st.session_state["show_toast"] = f"已入帳 ${amount:,.0f}"
+                        st.rerun()
 
 
 @st.dialog("校正錢包")
@@ -1970,7 +3020,6 @@ def dialog_adjustment():
             st.rerun()
     with col2:
         if st.button("確認校正", type="primary", use_container_width=True, key="adj_confirm"):
-            actual = parse_amount(actual_text)
             if not actual_text:
                 st.error("請輸入實際餘額")
             else:
@@ -1986,50 +3035,11 @@ def dialog_adjustment():
 @st.dialog("轉帳")
 def dialog_transfer():
     """帳戶間轉帳 Dialog"""
-    # 載入儲蓄目標
-    saving_goals = load_saving_goals()
-    active_goals = pd.DataFrame()
-    if not saving_goals.empty and "Status" in saving_goals.columns:
-        active_goals = saving_goals[saving_goals["Status"] == "Active"]
-
-    # 建立來源選項
-    source_options = ["Free Fund", "Back Up"]
-    source_account_map = {
-        "Free Fund": {"account": ACCOUNT_FREEFUND, "goal_id": ""},
-        "Back Up": {"account": ACCOUNT_BACKUP, "goal_id": ""}
-    }
-
-    # 加入 Saving 目標作為來源
-    if not active_goals.empty:
-        for _, goal in active_goals.iterrows():
-            goal_name = f"Saving: {goal['Name']}"
-            source_options.insert(-1, goal_name)  # 插入在 Back Up 之前
-            source_account_map[goal_name] = {
-                "account": ACCOUNT_SAVING,
-                "goal_id": goal["Goal_ID"]
-            }
-
-    # 建立目標選項
-    target_options = ["Wallet", "Free Fund", "Back Up"]
-    target_account_map = {
-        "Wallet": {"account": ACCOUNT_WALLET, "goal_id": ""},
-        "Free Fund": {"account": ACCOUNT_FREEFUND, "goal_id": ""},
-        "Back Up": {"account": ACCOUNT_BACKUP, "goal_id": ""}
-    }
-
-    # 加入 Saving 目標作為目標
-    if not active_goals.empty:
-        for _, goal in active_goals.iterrows():
-            goal_name = f"Saving: {goal['Name']}"
-            target_options.insert(-1, goal_name)  # 插入在 Back Up 之前
-            target_account_map[goal_name] = {
-                "account": ACCOUNT_SAVING,
-                "goal_id": goal["Goal_ID"]
-            }
+    source_options, target_options, transfer_accounts = get_transfer_choices()
 
     # 來源選擇
     selected_source = st.selectbox("轉出帳戶 *", source_options)
-    source_info = source_account_map.get(selected_source, {})
+    source_account, source_goal_id = transfer_accounts.get(selected_source, ("", ""))
 
     # 顯示來源餘額
     if selected_source == "Free Fund":
@@ -2040,8 +3050,7 @@ def dialog_transfer():
         st.caption(f"可用餘額：${source_balance:,.0f}")
         st.warning("⚠️ 將動用緊急儲備")
     elif selected_source.startswith("Saving:"):
-        goal_id = source_info.get("goal_id", "")
-        source_balance = get_saving_balance(goal_id)
+        source_balance = get_saving_balance(source_goal_id)
         st.caption(f"目前累積：${source_balance:,.0f}")
         st.warning("⚠️ 將影響儲蓄目標進度")
     else:
@@ -2049,88 +3058,92 @@ def dialog_transfer():
 
     # 目標選擇
     selected_target = st.selectbox("轉入帳戶 *", target_options)
-    target_info = target_account_map.get(selected_target, {})
-
-    # 金額輸入
-    amount_text = st.text_input("金額 *", placeholder="輸入金額")
+    target_account, target_goal_id = transfer_accounts.get(selected_target, ("", ""))
 
-    # 備註
-    note = st.text_input("備註（選填）")
+    # 帳戶選擇留在 form 外（切換時要即時更新可用餘額），金額與備註在 form 內
+    with st.form("transfer_form", border=False):
+        # 金額輸入
+        amount_text = st.text_input("金額 *", placeholder="輸入金額")
 
-    st.divider()
+        # 備註
+        note = st.text_input("備註（選填）")
 
-    # 按鈕
-    col1, col2 = st.columns(2)
-    with col1:
-        if st.button("取消", use_container_width=True, key="transfer_cancel"):
-            st.rerun()
-    with col2:
-        if st.button("確認轉帳", type="primary", use_container_width=True, key="transfer_confirm"):
-            amount = parse_amount(amount_text)
+        st.divider()
 
-            # 驗證
-            if amount <= 0:
-                st.error("請輸入有效金額")
-            elif selected_source == selected_target:
-                st.error("轉出與轉入帳戶不可相同")
-            elif amount > source_balance:
-                st.error(f"餘額不足（可用：${source_balance:,.0f}）")
-            else:
-                # 執行轉帳
-                source_account = source_info.get("account", "")
-                source_goal_id = source_info.get("goal_id", "")
-                target_account = target_info.get("account", "")
-                target_goal_id = target_info.get("goal_id", "")
-
-                if target_account == ACCOUNT_WALLET:
-                    # 轉入錢包：寫 Transaction + Wallet_Log
-                    # 決定來源顯示名稱
+        # 按鈕
+        col1, col2 = st.columns(2)
+        # 主要按鈕先宣告：表單內按 Enter 時送出的是第一個送出按鈕
+        with col2:
+            submitted = st.form_submit_button("確認轉帳", type="primary", use_container_width=True)
+        with col1:
+            if st.form_submit_button("取消", use_container_width=True):
+                st.rerun()
+        with col2:
+            if submitted:
+                amount = parse_amount(amount_text)
+                submission_id = _submission_id("transfer", (selected_source, selected_target, amount, note))
+
+                # 驗證
+                if amount <= 0:
+                    st.error("請輸入有效金額")
+                elif selected_source == selected_target:
+                    st.error("轉出與轉入帳戶不可相同")
+                elif _is_duplicate_submission(submission_id):
+                    st.warning("這筆轉帳已經送出過了")
+                elif amount > source_balance:
+                    st.error(f"餘額不足（可用：${source_balance:,.0f}）")
+                else:
+                    # 轉出帳戶顯示名稱（轉入錢包時寫進 Wallet_Log 備註）
                     if source_account == ACCOUNT_FREEFUND:
                         source_name = "Free Fund"
                     elif source_account == ACCOUNT_BACKUP:
                         source_name = "Back Up"
                     elif source_account == ACCOUNT_SAVING:
-                        # 找目標名稱
-                        goal_row = active_goals[active_goals["Goal_ID"] == source_goal_id]
-                        source_name = f"Saving ({goal_row.iloc[0]['Name']})" if not goal_row.empty else "Saving"
+                        # 選項為「Saving: 名稱」
+                        source_name = f"Saving ({selected_source.removeprefix('Saving: ')})"
                     else:
                         source_name = source_account
 
-                    # 寫 Transaction
-                    add_transaction(
-                        trans_type=TYPE_TRANSFER,
-                        amount=amount,
-                        account=source_account,
-                        target_account=ACCOUNT_WALLET,
-                        goal_id=source_goal_id,
-                        note=note or f"轉帳至錢包"
-                    )
-
-                    # 寫 Wallet_Log
-                    add_wallet_log(
-                        WALLET_TRANSFER_IN,
-                        amount,
-                        note=f"從 {source_name} 轉入"
-                    )
-
-                    st.session_state["show_toast"] = f"已從 {selected_source} 轉入錢包 ${amount:,.0f}"
-                    st.rerun()
-                else:
-                    # 帳戶間轉帳：只寫 Transaction
-                    # 決定要用哪個 goal_id
-                    goal_id = source_goal_id or target_goal_id
-
-                    add_transaction(
-                        trans_type=TYPE_TRANSFER,
-                        amount=amount,
-                        account=source_account,
-                        target_account=target_account,
-                        goal_id=goal_id,
-                        note=note or f"轉帳"
-                    )
-
-                    st.session_state["show_toast"] = f"已從 {selected_source} 轉帳 ${amount:,.0f} 至 {selected_target}"
-                    st.rerun()
+                    toast = ""
+                    try:
+                        # 上方的餘額可能已過時：持鎖以最新交易重新確認後才寫入
+                        with reserve_balance(source_account, source_goal_id, amount):
+                            if target_account == ACCOUNT_WALLET:
+                                # 轉入錢包：Transaction 與 Wallet_Log 一次寫入
+                                with batch_writes():
+                                    add_transaction(
+                                        trans_type=TYPE_TRANSFER,
+                                        amount=amount,
+                                        account=source_account,
+                                        target_account=ACCOUNT_WALLET,
+                                        goal_id=source_goal_id,
+                                        note=note or f"轉帳至錢包",
+                                        submission_id=submission_id
+                                    )
+                                    add_wallet_log(
+                                        WALLET_TRANSFER_IN,
+                                        amount,
+                                        note=f"從 {source_name} 轉入"
+                                    )
+                                toast = f"已從 {selected_source} 轉入錢包 ${amount:,.0f}"
+                            else:
+                                # 帳戶間轉帳：只寫 Transaction（goal_id 取來源或目標的 Saving）
+                                if add_transaction(
+                                    trans_type=TYPE_TRANSFER,
+                                    amount=amount,
+                                    account=source_account,
+                                    target_account=target_account,
+                                    goal_id=source_goal_id or target_goal_id,
+                                    note=note or f"轉帳",
+                                    submission_id=submission_id
+                                ):
+                                    toast = f"已從 {selected_source} 轉帳 ${amount:,.0f} 至 {selected_target}"
+                    except Exception as e:
+                        st.error(f"轉帳失敗: {e}")
+
+                    if toast:
+                        st.session_state["show_toast"] = toast
+                        st.rerun()
 
 
 @st.dialog("編輯銀行帳戶")
@@ -2184,118 +3197,104 @@ def quick_expense_dialog(category_id: str, category_name: str):
     st.write(f"**科目：{category_name}**")
 
     # Load sub_tags for this category
+    # 此科目啟用中的子類：名稱 → Sub_Tag_ID（同名取第一筆；沒有子類時為空 dict）
     sub_tags = load_sub_tags()
-    category_sub_tags = pd.DataFrame()
+    sub_tag_ids = {}
     if not sub_tags.empty and "Category_ID" in sub_tags.columns:
         category_sub_tags = sub_tags[
             (sub_tags["Category_ID"] == category_id) &
             (sub_tags["Status"] == "Active")
         ]
+        for name, sid in zip(category_sub_tags["Name"], category_sub_tags["Sub_Tag_ID"]):
+            sub_tag_ids.setdefault(name, sid)
 
     # Sub_tag selection (optional)
-    sub_tag_options = ["不選擇"]
-    if not category_sub_tags.empty:
-        sub_tag_options = sub_tag_options + category_sub_tags["Name"].tolist()
-    selected_sub_tag_name = st.selectbox("子類（選填）", sub_tag_options)
-
-    # Get sub_tag_id if selected
-    sub_tag_id = ""
-    if selected_sub_tag_name != "不選擇" and not category_sub_tags.empty:
-        sub_tag_row = category_sub_tags[category_sub_tags["Name"] == selected_sub_tag_name]
-        if not sub_tag_row.empty:
-            sub_tag_id = sub_tag_row.iloc[0]["Sub_Tag_ID"]
+    selected_sub_tag_name = st.selectbox("子類（選填）", ["不選擇", *sub_tag_ids])
+    sub_tag_id = sub_tag_ids.get(selected_sub_tag_name, "")
 
     # Get defaults (with sub_tag override logic)
     defaults = get_defaults_for_expense(category_id, sub_tag_id)
 
-    # Amount (required)
-    amount_str = st.text_input("金額 *", key="expense_amount", placeholder="輸入金額")
+    # 子類留在 form 外（切換時要帶入該子類的預設付款資訊），其餘欄位在 form 內
+    with st.form("expense_form", border=False):
+        # Amount (required)
+        amount_str = st.text_input("金額 *", key="expense_amount", placeholder="輸入金額")
 
-    # Item (optional but recommended)
-    item = st.text_input("品項（選填）", key="expense_item")
+        # Item (optional but recommended)
+        item = st.text_input("品項（選填）", key="expense_item")
 
-    # Note (optional)
-    note = st.text_input("備註（選填）", key="expense_note")
+        # Note (optional)
+        note = st.text_input("備註（選填）", key="expense_note")
 
-    st.markdown("---")
-    st.caption("付款資訊")
+        st.markdown("---")
+        st.caption("付款資訊")
 
-    # Bank Account selection
-    bank_accounts = load_bank_accounts()
-    bank_options = ["（未設定）"]
-    bank_id_map = {"（未設定）": ""}
-
-    if not bank_accounts.empty:
-        active_banks = bank_accounts[bank_accounts["Status"] == "Active"]
-        for _, bank in active_banks.iterrows():
-            bank_options.append(bank["Name"])
-            bank_id_map[bank["Name"]] = bank["Bank_ID"]
-
-    # Find default bank index
-    default_bank_idx = 0
-    if defaults.get("bank_id"):
-        for i, opt in enumerate(bank_options):
-            if bank_id_map.get(opt, "") == defaults["bank_id"]:
-                default_bank_idx = i
-                break
-
-    selected_bank_name = st.selectbox("銀行帳戶", bank_options, index=default_bank_idx)
-    bank_id = bank_id_map.get(selected_bank_name, "")
-
-    # Payment Method selection
-    payment_options = ["（未設定）", "直接付款", "信用卡"]
-    payment_map = {"直接付款": PAYMENT_DIRECT, "信用卡": PAYMENT_CREDIT}
-    reverse_payment_map = {PAYMENT_DIRECT: "直接付款", PAYMENT_CREDIT: "信用卡"}
-
-    # Find default payment index
-    default_payment_idx = 0
-    if defaults.get("payment_method"):
-        default_label = reverse_payment_map.get(defaults["payment_method"], "")
-        if default_label in payment_options:
-            default_payment_idx = payment_options.index(default_label)
-
-    selected_payment = st.selectbox("支付方式", payment_options, index=default_payment_idx)
-    payment_method = payment_map.get(selected_payment, "")
+        # Bank Account selection
+        bank_names, bank_ids, bank_index = get_active_bank_choices()
+        bank_options = ["（未設定）"] + bank_names
+        bank_id_map = {"（未設定）": "", **dict(zip(bank_names, bank_ids))}
 
-    st.divider()
+        # Find default bank index（Bank_ID → 選項位置，第 0 項為「未設定」）
+        default_bank_idx = bank_index.get(defaults.get("bank_id", ""), 0)
 
-    # Buttons
-    col1, col2 = st.columns(2)
-    with col1:
-        if st.button("取消", use_container_width=True, key="expense_cancel"):
-            st.rerun()
-    with col2:
-        if st.button("💸 記錄支出", type="primary", use_container_width=True, key="expense_submit"):
-            # Validate
-            amount = parse_amount(amount_str)
-            if amount is None or amount <= 0:
-                st.error("請輸入有效金額")
-                return
+        selected_bank_name = st.selectbox("銀行帳戶", bank_options, index=default_bank_idx)
+        bank_id = bank_id_map.get(selected_bank_name, "")
 
-            # Check active period
-            period = get_active_period()
-            if period is None:
-                st.error("請先啟動週期儀式")
-                return
+        # Payment Method selection
+        default_payment_idx = PAYMENT_OPTION_INDEX.get(defaults.get("payment_method", ""), 0)
+        selected_payment = st.selectbox("支付方式", PAYMENT_OPTIONS, index=default_payment_idx)
+        payment_method = PAYMENT_OPTION_CODES.get(selected_payment, "")
 
-            # Add transaction
-            success = add_transaction(
-                trans_type=TYPE_EXPENSE,
-                amount=amount,
-                account=ACCOUNT_LIVING,
-                category_id=category_id,
-                sub_tag_id=sub_tag_id,
-                item=item,
-                note=note,
-                period_id=period["Period_ID"],
-                bank_id=bank_id,
-                payment_method=payment_method
-            )
+        st.divider()
 
-            if success:
-                st.session_state["show_toast"] = f"✅ 已記錄 ${amount:,.0f}"
-                st.cache_data.clear()
+        # Buttons
+        col1, col2 = st.columns(2)
+        # 主要按鈕先宣告：表單內按 Enter 時送出的是第一個送出按鈕
+        with col2:
+            submitted = st.form_submit_button("💸 記錄支出", type="primary", use_container_width=True)
+        with col1:
+            if st.form_submit_button("取消", use_container_width=True):
                 st.rerun()
+        with col2:
+            if submitted:
+                # Validate
+                amount = parse_amount(amount_str)
+                if amount is None or amount <= 0:
+                    st.error("請輸入有效金額")
+                    return
+
+                # Check active period
+                period = get_active_period()
+                if period is None:
+                    st.error("請先啟動週期儀式")
+                    return
+
+                submission_id = _submission_id(
+                    "expense",
+                    (category_id, sub_tag_id, amount, item, note, bank_id, payment_method)
+                )
+                if _is_duplicate_submission(submission_id):
+                    st.warning("這筆支出已經記錄過了")
+                    return
+
+                # Add transaction
+                success = add_transaction(
+                    trans_type=TYPE_EXPENSE,
+                    amount=amount,
+                    account=ACCOUNT_LIVING,
+                    category_id=category_id,
+                    sub_tag_id=sub_tag_id,
+                    item=item,
+                    note=note,
+                    period_id=period["Period_ID"],
+                    bank_id=bank_id,
+                    payment_method=payment_method,
+                    submission_id=submission_id
+                )
+
+                if success:
+                    st.session_state["show_toast"] = f"✅ 已記錄 ${amount:,.0f}"
+                    st.rerun()
 
 
 @st.dialog("選擇科目")
@@ -2319,19 +3318,16 @@ def select_category_dialog():
 
     st.write("請選擇要記帳的科目：")
 
-    # Display all active categories as buttons in a grid
-    num_cols = 3
-    cols = st.columns(num_cols)
-
-    for i, (_, cat) in enumerate(active_cats.iterrows()):
-        with cols[i % num_cols]:
-            if st.button(cat["Name"], key=f"cat_select_{cat['Category_ID']}", use_container_width=True):
-                # Store selected category in session_state for chained dialog
-                st.session_state["open_expense_category"] = {
-                    "Category_ID": cat["Category_ID"],
-                    "Name": cat["Name"]
-                }
-                st.rerun()
+    # 所有啟用科目放在同一個 radio（一個元件），不再每個科目各一顆按鈕
+    cat_names = dict(zip(active_cats["Category_ID"], active_cats["Name"]))
+    picked = st.radio(
+        "科目", list(cat_names), format_func=cat_names.get, index=None,
+        horizontal=True, label_visibility="collapsed", key="cat_select_pick"
+    )
+    if picked:
+        # Store selected category in session_state for chained dialog
+        st.session_state["open_expense_category"] = {"Category_ID": picked, "Name": cat_names[picked]}
+        st.rerun()
 
     st.divider()
     if st.button("取消", use_container_width=True, key="cat_dialog_cancel"):
@@ -2358,78 +3354,96 @@ def render_category_progress(period_id: str):
 
     st.markdown("### 📊 科目進度")
 
-    for _, cat in active_cats.iterrows():
-        budget = float(cat.get("Budget", 0) or 0)
-        if budget <= 0:
-            continue
-
-        # Calculate spent
-        spent = get_category_spent(cat["Category_ID"], period_id)
-
-        # Calculate progress
-        progress = min(spent / budget, 1.0) if budget > 0 else 0
-
-        # Display
-        warning = " ⚠️" if progress >= 0.9 else ""
-        st.caption(f"**{cat['Name']}**{warning}")
-        st.progress(min(progress, 1.0))
-        remaining = budget - spent
-        if remaining < 0:
-            st.caption(f"${spent:,.0f} / ${budget:,.0f}（超支 ${abs(remaining):,.0f}）")
-        else:
-            st.caption(f"${spent:,.0f} / ${budget:,.0f}（剩餘 ${remaining:,.0f}）")
+    # 一次 groupby 算出各科目本期支出（取代逐科目掃描交易）
+    period_expenses = get_period_living_expenses(period_id)
+    if period_expenses.empty:
+        spent_by_cat = pd.Series(dtype="float64")
+    else:
+        spent_by_cat = period_expenses.groupby("Category_ID", observed=True)["Amount"].sum()
+
+    # 向量化計算進度與剩餘
+    progress_df = active_cats[active_cats["Budget"] > 0].copy()
+    progress_df["Spent"] = progress_df["Category_ID"].map(spent_by_cat).fillna(0.0).astype(float)
+    progress_df["Progress"] = (progress_df["Spent"] / progress_df["Budget"]).clip(upper=1.0)
+    progress_df["Remaining"] = progress_df["Budget"] - progress_df["Spent"]
+
+    # Display：所有科目合併成一個表格元素（取代每個科目各自的 caption + progress）
+    table = pd.DataFrame({
+        "科目": progress_df["Name"] + np.where(progress_df["Progress"] >= 0.9, " ⚠️", ""),
+        "進度": progress_df["Progress"] * 100,
+        "支出 / 預算": [
+            f"${spent:,.0f} / ${budget:,.0f}"
+            for spent, budget in zip(progress_df["Spent"], progress_df["Budget"])
+        ],
+        "剩餘": [
+            f"超支 ${-remaining:,.0f}" if remaining < 0 else f"${remaining:,.0f}"
+            for remaining in progress_df["Remaining"]
+        ],
+    })
+    st.dataframe(
+        table,
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "進度": st.column_config.ProgressColumn("進度", format="%.0f%%", min_value=0, max_value=100),
+        },
+    )
 
 
 def render_transaction_list(period_id: str):
     """渲染本期消費紀錄"""
     with st.expander("📋 本期消費紀錄", expanded=False):
-        transactions = load_transactions()
-
-        if transactions.empty:
+        if get_data_counts()[SHEET_TRANSACTION] == 0:
             st.info("尚無交易記錄")
             return
 
-        period_txns = transactions[
-            (transactions["Period_ID"] == period_id) &
-            (transactions["Type"] == TYPE_EXPENSE) &
-            (transactions["Account"] == ACCOUNT_LIVING)
-        ].sort_values("Date", ascending=False)
+        recent_txns = get_recent_living_expenses(period_id, 20)
 
-        if period_txns.empty:
+        if recent_txns.empty:
             st.info("本期尚無消費紀錄")
             return
 
         # Get reference data
-        categories = load_categories()
-        cat_map = {}
-        if not categories.empty:
-            cat_map = dict(zip(categories["Category_ID"], categories["Name"]))
-
-        bank_accounts = load_bank_accounts()
-        bank_map = {}
-        if not bank_accounts.empty:
-            bank_map = dict(zip(bank_accounts["Bank_ID"], bank_accounts["Name"]))
-
-        # Display
-        for _, txn in period_txns.head(20).iterrows():
-            date_val = txn["Date"]
-            if isinstance(date_val, str):
-                date_str = pd.to_datetime(date_val).strftime("%m/%d")
-            elif hasattr(date_val, 'strftime'):
-                date_str = date_val.strftime("%m/%d")
-            else:
-                date_str = str(date_val)[:5]
+        cat_map = get_category_name_map()
+        bank_map = get_bank_name_map()
+
+        # 日期字串一次向量化格式化，迴圈內不再逐筆判斷型別
+        # （Date 已在 load_transactions 轉為 datetime，Amount 已是 float64）
+        recent_txns = recent_txns.assign(
+            DateStr=recent_txns["Date"].dt.strftime("%m/%d").fillna(""),
+            # category 欄位：每個 ID 只查一次對照表，再依整數代碼展開
+            CatName=_map_category_codes(recent_txns["Category_ID"], cat_map, "—"),
+            BankName=_map_category_codes(recent_txns["Bank_ID"], bank_map, ""),
+            PayIcon=np.where(
+                recent_txns["Payment_Method"].eq(PAYMENT_CREDIT), "💳",
+                np.where(recent_txns["Payment_Method"].eq(PAYMENT_DIRECT), "💵", "")
+            )
+        )
+
+        # Display：迴圈只讀取預先算好的欄位，所有紀錄合併成一個 markdown 元素
+        lines = []
+        for txn in recent_txns.itertuples(index=False):
+            item = txn.Item or "—"
+            bank_display = f" · {txn.BankName}" if txn.BankName else ""
+            lines.append(f"**{txn.DateStr}** {txn.CatName} · {item}  **-${txn.Amount:,.0f}**{bank_display} {txn.PayIcon}")
+        st.markdown("\n\n".join(lines))
 
-            cat_name = cat_map.get(txn.get("Category_ID", ""), "—")
-            item = txn.get("Item", "") or "—"
-            amount = float(txn.get("Amount", 0))
-            bank_name = bank_map.get(txn.get("Bank_ID", ""), "")
 
-            payment = txn.get("Payment_Method", "")
-            payment_icon = "💳" if payment == PAYMENT_CREDIT else ("💵" if payment == PAYMENT_DIRECT else "")
+# 快速記帳選單中「更多」的選項值（不會與 Category_ID 衝突）
+QUICK_PICK_MORE = "__more__"
 
-            bank_display = f" · {bank_name}" if bank_name else ""
-            st.markdown(f"**{date_str}** {cat_name} · {item}  **-${amount:,.0f}**{bank_display} {payment_icon}")
+
+def _on_quick_category_pick(quick_names: dict):
+    """
+    快速記帳選單的 on_change：記下要開啟的 Dialog（由 tab_expense 開頭開啟），
+    並把選單清回未選取，下次點同一個科目仍會觸發。
+    """
+    picked = st.session_state.get("quick_category_pick")
+    st.session_state["quick_category_pick"] = None
+    if picked == QUICK_PICK_MORE:
+        st.session_state["open_category_dialog"] = True
+    elif picked:
+        st.session_state["open_expense_category"] = {"Category_ID": picked, "Name": quick_names[picked]}
 
 
 def tab_expense():
@@ -2443,18 +3457,27 @@ def tab_expense():
     if st.session_state.get("open_expense_category"):
         cat = st.session_state["open_expense_category"]
         st.session_state["open_expense_category"] = None
+        _reset_submission_id("expense")
         quick_expense_dialog(cat["Category_ID"], cat["Name"])
+    elif st.session_state.pop("open_category_dialog", False):
+        select_category_dialog()
 
     # 狀態總覽區域
-    period = get_active_period()
+    period_info = get_active_period_info()
+    period = period_info["period"]
+    period_id = period_info["period_id"]
+    overdue = period_info["is_overdue"]
+
+    # 一次算出所有狀態數值
+    dashboard = compute_dashboard_state(period_id)
 
     # === Status Overview (2x2 grid) ===
     col1, col2 = st.columns(2)
     with col1:
-        wallet = get_wallet_balance()
+        wallet = dashboard["wallet"]
         st.metric("💰 錢包", f"${wallet:,.0f}")
     with col2:
-        backup_balance = get_backup_balance()
+        backup_balance = dashboard["backup"]
         backup_limit = float(config.get("Back_Up_Limit", 150000) or 150000)
         backup_pct = backup_balance / backup_limit if backup_limit > 0 else 0
 
@@ -2467,14 +3490,14 @@ def tab_expense():
 
     col3, col4 = st.columns(2)
     with col3:
-        free_fund = get_free_fund_balance()
+        free_fund = dashboard["free_fund"]
         st.metric("✨ Free Fund", f"${free_fund:,.0f}")
     with col4:
         if period is not None:
-            days_left = get_period_days_left(period)
-            end_date = ensure_date(period["End_Date"])
+            days_left = dashboard["days_left"]
+            end_date = period_info["end"]
 
-            if is_period_overdue(period):
+            if overdue:
                 st.warning("⚠️ 週期已結束，待結算")
             else:
                 st.metric("📅 週期剩餘", f"{days_left} 天（至 {end_date.strftime('%m/%d')}）")
@@ -2484,11 +3507,10 @@ def tab_expense():
     st.divider()
 
     # === Daily Available ===
-    if period is not None and not is_period_overdue(period):
-        period_id = period["Period_ID"]
-        daily = get_daily_available(period_id)
-        remaining = get_living_remaining(period_id)
-        days_left = get_period_days_left(period)
+    if period is not None and not overdue:
+        daily = dashboard["daily_available"]
+        remaining = dashboard["living_remaining"]
+        days_left = dashboard["days_left"]
 
         if daily >= 0:
             st.markdown(f"### 今日可用：${daily:,.0f}")
@@ -2496,7 +3518,7 @@ def tab_expense():
             st.markdown(f"### 今日可用：:red[${daily:,.0f}]")
             st.error("Living 已超支！")
         st.caption(f"Living 剩餘 ${remaining:,.0f} ÷ {days_left} 天")
-    elif period is not None and is_period_overdue(period):
+    elif period is not None and overdue:
         st.warning("⚠️ 週期已結束，請到「策略」頁面進行結算")
         return  # Don't show expense UI if period is overdue
     else:
@@ -2509,34 +3531,27 @@ def tab_expense():
     st.markdown("### ⚡ 快速記帳")
 
     categories = load_categories()
-    quick_cats = pd.DataFrame()
+    quick_cats = None
 
     if not categories.empty:
         active_cats = categories[categories["Status"] == "Active"]
         # Check if Is_Quick_Access column exists
-        if "Is_Quick_Access" in active_cats.columns:
-            quick_cats = active_cats[
-                active_cats["Is_Quick_Access"].astype(str).str.upper().isin(["TRUE", "1", "Y", "YES"])
-            ]
+        if "QuickAccess" in active_cats.columns:
+            quick_cats = active_cats[active_cats["QuickAccess"]]
         else:
             # Fallback: use first 6 active categories
             quick_cats = active_cats.head(6)
 
-    if not quick_cats.empty:
-        # Limit to 6 quick access categories
+    if quick_cats is not None and not quick_cats.empty:
+        # Limit to 6 quick access categories；快速科目與「更多」合成一個 radio
         quick_cats_limited = quick_cats.head(6)
-        num_buttons = len(quick_cats_limited) + 1  # +1 for "more" button
-        cols = st.columns(min(num_buttons, 7))
-
-        for i, (_, cat) in enumerate(quick_cats_limited.iterrows()):
-            with cols[i]:
-                if st.button(cat["Name"], key=f"quick_{cat['Category_ID']}", use_container_width=True):
-                    quick_expense_dialog(cat["Category_ID"], cat["Name"])
-
-        # "More" button
-        with cols[min(len(quick_cats_limited), 6)]:
-            if st.button("📝 更多", use_container_width=True, key="more_categories"):
-                select_category_dialog()
+        quick_names = dict(zip(quick_cats_limited["Category_ID"], quick_cats_limited["Name"]))
+        quick_names[QUICK_PICK_MORE] = "📝 更多"
+        st.radio(
+            "快速記帳", list(quick_names), format_func=quick_names.get, index=None,
+            horizontal=True, label_visibility="collapsed", key="quick_category_pick",
+            on_change=_on_quick_category_pick, args=(quick_names,)
+        )
     else:
         st.info("尚無科目，請先在「策略」頁面設定")
         if st.button("📝 選擇科目", use_container_width=True, key="select_cat_btn"):
@@ -2587,18 +3602,23 @@ def dialog_saving_deposit(goal_id: str, goal_name: str):
                 st.error("請輸入有效金額")
                 return
 
+            submission_id = _submission_id("saving_deposit", (goal_id, amount, note.strip()))
+            if _is_duplicate_submission(submission_id):
+                st.warning("這筆存入已經送出過了")
+                return
+
             # Write transaction
             success = add_transaction(
                 trans_type=TYPE_SAVING_IN,
                 amount=amount,
                 account=ACCOUNT_SAVING,
                 goal_id=goal_id,
-                note=note.strip() if note.strip() else "存入"
+                note=note.strip() if note.strip() else "存入",
+                submission_id=submission_id
             )
 
             if success:
                 st.session_state["show_toast"] = f"✅ 已存入 ${amount:,.0f}"
-                st.cache_data.clear()
                 st.rerun()
             else:
                 st.error("存入失敗，請稍後再試")
@@ -2615,10 +3635,9 @@ def dialog_saving_withdraw(goal_id: str, goal_name: str, default_bank_id: str =
 
     # Load data for dropdowns
     categories = load_categories()
-    active_cats = categories[categories["Status"] == "Active"] if not categories.empty else pd.DataFrame()
+    active_cats = categories[categories["Status"] == "Active"] if not categories.empty else categories
 
-    banks = load_bank_accounts()
-    active_banks = banks[banks["Status"] == "Active"] if not banks.empty else pd.DataFrame()
+    active_bank_names, active_bank_ids, active_bank_index = get_active_bank_choices()
 
     # Category selection (required)
     if active_cats.empty:
@@ -2645,22 +3664,16 @@ def dialog_saving_withdraw(goal_id: str, goal_name: str, default_bank_id: str =
     st.caption("付款資訊")
 
     # Bank Account (optional, with default)
-    bank_names = ["（未設定）"] + (active_banks["Name"].tolist() if not active_banks.empty else [])
-    bank_ids = [""] + (active_banks["Bank_ID"].tolist() if not active_banks.empty else [])
-    default_bank_idx = 0
-    if default_bank_id and default_bank_id in bank_ids:
-        default_bank_idx = bank_ids.index(default_bank_id)
+    bank_names = ["（未設定）"] + active_bank_names
+    bank_ids = [""] + active_bank_ids
+    default_bank_idx = active_bank_index.get(default_bank_id, 0)
     selected_bank_idx = st.selectbox("銀行帳戶", range(len(bank_names)), format_func=lambda x: bank_names[x], index=default_bank_idx, key="withdraw_bank")
     selected_bank_id = bank_ids[selected_bank_idx]
 
     # Payment Method (optional, with default)
-    payment_names = ["（未設定）", "直接付款", "信用卡"]
-    payment_values = ["", PAYMENT_DIRECT, PAYMENT_CREDIT]
-    default_payment_idx = 0
-    if default_payment_method and default_payment_method in payment_values:
-        default_payment_idx = payment_values.index(default_payment_method)
-    selected_payment_idx = st.selectbox("支付方式", range(len(payment_names)), format_func=lambda x: payment_names[x], index=default_payment_idx, key="withdraw_payment")
-    selected_payment_value = payment_values[selected_payment_idx]
+    default_payment_idx = PAYMENT_OPTION_INDEX.get(default_payment_method, 0)
+    selected_payment_idx = st.selectbox("支付方式", range(len(PAYMENT_OPTIONS)), format_func=lambda x: PAYMENT_OPTIONS[x], index=default_payment_idx, key="withdraw_payment")
+    selected_payment_value = PAYMENT_OPTION_VALUES[selected_payment_idx]
 
     st.divider()
 
@@ -2685,6 +3698,15 @@ def dialog_saving_withdraw(goal_id: str, goal_name: str, default_bank_id: str =
                 st.error("請輸入品項")
                 return
 
+            submission_id = _submission_id(
+                "saving_withdraw",
+                (goal_id, selected_cat_id, amount, item.strip(), note.strip() if note else "",
+                 selected_bank_id, selected_payment_value)
+            )
+            if _is_duplicate_submission(submission_id):
+                st.warning("這筆支出已經送出過了")
+                return
+
             # Write transaction
             success = add_transaction(
                 trans_type=TYPE_SAVING_OUT,
@@ -2695,12 +3717,12 @@ def dialog_saving_withdraw(goal_id: str, goal_name: str, default_bank_id: str =
                 item=item.strip(),
                 note=note.strip() if note else "",
                 bank_id=selected_bank_id,
-                payment_method=selected_payment_value
+                payment_method=selected_payment_value,
+                submission_id=submission_id
             )
 
             if success:
                 st.session_state["show_toast"] = f"✅ 已支出 ${amount:,.0f}"
-                st.cache_data.clear()
                 st.rerun()
             else:
                 st.error("支出失敗，請稍後再試")
@@ -2767,43 +3789,42 @@ def dialog_complete_goal(goal_id: str, goal_name: str, target_amount: float):
                 st.error("實際支出不可超過累積金額")
                 return
 
-            success = True
-
-            # Step 1: If difference > 0, add Settlement_In (difference → Free Fund)
-            if difference > 0:
-                success = add_transaction(
-                    trans_type=TYPE_SETTLEMENT_IN,
-                    amount=difference,
-                    account=ACCOUNT_FREEFUND,
-                    goal_id=goal_id,
-                    note=f"目標完成差額：{goal_name}",
-                    ref=f"Goal_Complete_{goal_id}"
-                )
-
-            # Step 2: Add Saving_Out for actual expense
-            if success:
-                success = add_transaction(
-                    trans_type=TYPE_SAVING_OUT,
-                    amount=amount,
-                    account=ACCOUNT_SAVING,
-                    goal_id=goal_id,
-                    item=f"目標完成：{goal_name}",
-                    note=note.strip() if note else "",
-                    ref=f"Goal_Complete_{goal_id}"
-                )
-
-            # Step 3: Update goal status
-            if success:
-                success = update_saving_goal_status(goal_id, "Completed")
+            try:
+                # 三個步驟一次寫入（Transaction 兩列 + Saving_Goal 欄位 → 1 次 API 呼叫）；
+                # 任一步失敗就丟出例外，整批捨棄，不會只寫入一半
+                with batch_writes():
+                    # Step 1: If difference > 0, add Settlement_In (difference → Free Fund)
+                    if difference > 0:
+                        add_transaction(
+                            trans_type=TYPE_SETTLEMENT_IN,
+                            amount=difference,
+                            account=ACCOUNT_FREEFUND,
+                            goal_id=goal_id,
+                            note=f"目標完成差額：{goal_name}",
+                            ref=f"Goal_Complete_{goal_id}"
+                        )
+
+                    # Step 2: Add Saving_Out for actual expense
+                    add_transaction(
+                        trans_type=TYPE_SAVING_OUT,
+                        amount=amount,
+                        account=ACCOUNT_SAVING,
+                        goal_id=goal_id,
+                        item=f"目標完成：{goal_name}",
+                        note=note.strip() if note else "",
+                        ref=f"Goal_Complete_{goal_id}"
+                    )
 
-            if success:
+                    # Step 3: Update goal status
+                    if not update_saving_goal_status(goal_id, "Completed"):
+                        raise RuntimeError("無法更新目標狀態")
+            except Exception as e:
+                st.error(f"操作失敗，請稍後再試（{e}）")
+            else:
                 # Clear instance key on success
                 del st.session_state[dialog_instance_key]
                 st.session_state["show_toast"] = f"✅ 目標「{goal_name}」已完成！"
-                st.cache_data.clear()
                 st.rerun()
-            else:
-                st.error("操作失敗，請稍後再試")
 
 
 @st.dialog("新增目標")
@@ -2812,8 +3833,7 @@ def dialog_add_goal():
     st.caption("建立有目標金額的儲蓄計畫")
 
     # Load bank accounts for dropdown
-    banks = load_bank_accounts()
-    active_banks = banks[banks["Status"] == "Active"] if not banks.empty else pd.DataFrame()
+    active_bank_names, active_bank_ids, _ = get_active_bank_choices()
 
     # Name (required)
     name = st.text_input("目標名稱 *", placeholder="例：買 Switch", key="add_goal_name")
@@ -2832,18 +3852,16 @@ def dialog_add_goal():
     st.divider()
     st.caption("預設值（支出時自動帶入）")
 
-    bank_names = ["（不設定）"] + (active_banks["Name"].tolist() if not active_banks.empty else [])
-    bank_ids = [""] + (active_banks["Bank_ID"].tolist() if not active_banks.empty else [])
+    bank_names = ["（不設定）"] + active_bank_names
+    bank_ids = [""] + active_bank_ids
     selected_bank_idx = st.selectbox("預設銀行帳戶", range(len(bank_names)),
                                       format_func=lambda x: bank_names[x], key="add_goal_bank")
     selected_bank_id = bank_ids[selected_bank_idx]
 
     # Default Payment Method (optional)
-    payment_names = ["（不設定）", "直接付款", "信用卡"]
-    payment_values = ["", PAYMENT_DIRECT, PAYMENT_CREDIT]
-    selected_payment_idx = st.selectbox("預設支付方式", range(len(payment_names)),
-                                         format_func=lambda x: payment_names[x], key="add_goal_payment")
-    selected_payment_value = payment_values[selected_payment_idx]
+    selected_payment_idx = st.selectbox("預設支付方式", range(len(PAYMENT_DEFAULT_OPTIONS)),
+                                         format_func=lambda x: PAYMENT_DEFAULT_OPTIONS[x], key="add_goal_payment")
+    selected_payment_value = PAYMENT_OPTION_VALUES[selected_payment_idx]
 
     st.divider()
 
@@ -2887,8 +3905,7 @@ def dialog_add_pool():
     st.caption("建立無目標金額的資金池（如：投資、旅遊基金）")
 
     # Load bank accounts for dropdown
-    banks = load_bank_accounts()
-    active_banks = banks[banks["Status"] == "Active"] if not banks.empty else pd.DataFrame()
+    active_bank_names, active_bank_ids, _ = get_active_bank_choices()
 
     # Name (required)
     name = st.text_input("資金池名稱 *", placeholder="例：投資", key="add_pool_name")
@@ -2897,18 +3914,16 @@ def dialog_add_pool():
     st.divider()
     st.caption("預設值（支出時自動帶入）")
 
-    bank_names = ["（不設定）"] + (active_banks["Name"].tolist() if not active_banks.empty else [])
-    bank_ids = [""] + (active_banks["Bank_ID"].tolist() if not active_banks.empty else [])
+    bank_names = ["（不設定）"] + active_bank_names
+    bank_ids = [""] + active_bank_ids
     selected_bank_idx = st.selectbox("預設銀行帳戶", range(len(bank_names)),
                                       format_func=lambda x: bank_names[x], key="add_pool_bank")
     selected_bank_id = bank_ids[selected_bank_idx]
 
     # Default Payment Method (optional)
-    payment_names = ["（不設定）", "直接付款", "信用卡"]
-    payment_values = ["", PAYMENT_DIRECT, PAYMENT_CREDIT]
-    selected_payment_idx = st.selectbox("預設支付方式", range(len(payment_names)),
-                                         format_func=lambda x: payment_names[x], key="add_pool_payment")
-    selected_payment_value = payment_values[selected_payment_idx]
+    selected_payment_idx = st.selectbox("預設支付方式", range(len(PAYMENT_DEFAULT_OPTIONS)),
+                                         format_func=lambda x: PAYMENT_DEFAULT_OPTIONS[x], key="add_pool_payment")
+    selected_payment_value = PAYMENT_OPTION_VALUES[selected_payment_idx]
 
     st.divider()
 
@@ -2957,59 +3972,107 @@ def render_saving_transactions(goal_id: str):
         st.caption("尚無交易紀錄")
         return
 
-    for _, txn in txns.iterrows():
-        date_str = str(txn["Date"])[:10] if txn["Date"] else ""
-        amount = float(txn["Amount"]) if txn["Amount"] else 0
-        note = txn.get("Note", "") or ""
-        txn_type = txn["Type"]
-
-        if txn_type == TYPE_SAVING_IN:
-            # Deposit: +$X (date) note
-            line = f"➕ ${amount:,.0f}　{date_str}"
-            if note:
-                line += f"　{note}"
-            st.caption(line)
-        elif txn_type == TYPE_SAVING_OUT:
-            # Withdraw: -$X (date) category/item note
-            category = txn.get("Category_ID", "") or ""
-            item = txn.get("Item", "") or ""
-            line = f"➖ ${amount:,.0f}　{date_str}"
-            if category or item:
-                line += f"　{category}"
-                if item:
-                    line += f"/{item}"
-            if note:
-                line += f"　{note}"
-            st.caption(line)
-        elif txn_type == TYPE_TRANSFER:
-            # Transfer: 判斷是轉入還是轉出
-            account = txn.get("Account", "") or ""
-            target_account = txn.get("Target_Account", "") or ""
-
-            if account == ACCOUNT_SAVING:
-                # 轉出
-                target_display = target_account if target_account != ACCOUNT_WALLET else "錢包"
-                line = f"↗️ ${amount:,.0f}　{date_str}　轉出至 {target_display}"
-            else:
-                # 轉入
-                source_display = account if account else "其他帳戶"
-                line = f"↘️ ${amount:,.0f}　{date_str}　從 {source_display} 轉入"
+    def text(col: str) -> np.ndarray:
+        """欄位轉成字串陣列（缺欄或空值為空字串），方便整欄串接"""
+        if col not in txns.columns:
+            return np.full(len(txns), "", dtype=object)
+        return txns[col].astype(object).fillna("").to_numpy(dtype=object)
+
+    # 整欄組出每筆的顯示文字，迴圈只剩 st.caption
+    amount = txns["Amount"].fillna(0).map("${:,.0f}".format).to_numpy(dtype=object)
+    head = amount + "　" + txns["Date"].dt.strftime("%Y-%m-%d").fillna("").to_numpy(dtype=object)
+    note = text("Note")
+    note_suffix = np.where(note != "", "　" + note, "")
+
+    # Withdraw: 科目/品項
+    category, item = text("Category_ID"), text("Item")
+    out_detail = np.where(
+        (category != "") | (item != ""),
+        "　" + category + np.where(item != "", "/" + item, ""),
+        ""
+    )
+
+    # Transfer: 來源為 Saving 是轉出，否則是轉入
+    account, target_account = text("Account"), text("Target_Account")
+    target_display = np.where(target_account == ACCOUNT_WALLET, "錢包", target_account)
+    source_display = np.where(account == "", "其他帳戶", account)
+
+    txn_type = txns["Type"].astype(object).to_numpy()
+    is_transfer = txn_type == TYPE_TRANSFER
+    lines = np.select(
+        [
+            txn_type == TYPE_SAVING_IN,
+            txn_type == TYPE_SAVING_OUT,
+            is_transfer & (account == ACCOUNT_SAVING),
+            is_transfer,
+        ],
+        [
+            "➕ " + head,
+            "➖ " + head + out_detail,
+            "↗️ " + head + "　轉出至 " + target_display,
+            "↘️ " + head + "　從 " + source_display + " 轉入",
+        ],
+        default=""
+    )
+
+    for line, suffix in zip(lines, note_suffix):
+        if line:
+            st.caption(line + suffix)
+
+
+# 目標卡片的操作選項（radio 的值 → 顯示文字）
+GOAL_ACTIONS = {"deposit": "存入", "withdraw": "支出", "complete": "完成目標"}
+
+
+def _on_goal_action(goal_id: str):
+    """
+    卡片操作選單的 on_change：記下要開啟的 Dialog（由該卡片在這次重跑時開啟），
+    並把選單清回未選取，下次點同一個操作仍會觸發。
+    """
+    key = f"goal_action_{goal_id}"
+    action = st.session_state.get(key)
+    st.session_state[key] = None
+    if action:
+        st.session_state["open_goal_action"] = (goal_id, action)
+
+
+def _pick_goal_action(goal_id: str, actions: tuple) -> str:
+    """顯示卡片操作選單，回傳這次要執行的操作（沒有則回傳空字串）"""
+    st.radio(
+        "操作", actions, format_func=GOAL_ACTIONS.get, index=None,
+        horizontal=True, label_visibility="collapsed", key=f"goal_action_{goal_id}",
+        on_change=_on_goal_action, args=(goal_id,)
+    )
+    pending = st.session_state.get("open_goal_action")
+    if pending and pending[0] == goal_id:
+        del st.session_state["open_goal_action"]
+        return pending[1]
+    return ""
+
 
-            if note:
-                line += f"　{note}"
-            st.caption(line)
+@st.fragment
+def render_saving_details(goal_id: str):
+    """
+    目標卡片的明細開關：打開時才產生交易列表
+    （expander 收合時內容仍會全部送到前端）；切換只重跑這個 fragment。
+    """
+    if st.toggle("📋 明細", key=f"details_{goal_id}"):
+        render_saving_transactions(goal_id)
 
 
 def render_goal_card(row):
-    """Render a goal card (Has_Target = TRUE)"""
-    goal_id = row["Goal_ID"]
-    name = row["Name"]
-    balance = get_saving_balance(goal_id)
-    target = float(row["Target_Amount"]) if row["Target_Amount"] else 0
+    """Render a goal card (Has_Target = TRUE)
+
+    row 為 itertuples 的一列，需含 tab_goals 預先算好的 Balance / Target / Progress 欄位
+    """
+    goal_id = row.Goal_ID
+    name = row.Name
+    balance = row.Balance
+    target = row.Target
 
     # Get defaults for withdraw dialog
-    default_bank = row.get("Default_Bank_ID", "") or ""
-    default_payment = row.get("Default_Payment_Method", "") or ""
+    default_bank = getattr(row, "Default_Bank_ID", "") or ""
+    default_payment = getattr(row, "Default_Payment_Method", "") or ""
 
     with st.container(border=True):
         st.markdown(f"**🎯 {name}**")
@@ -3017,61 +4080,61 @@ def render_goal_card(row):
         if target > 0:
             percentage = int(balance / target * 100)
             st.markdown(f"${balance:,.0f} / ${target:,.0f} ({percentage}%)")
-            st.progress(min(balance / target, 1.0))
+            st.progress(row.Progress)
         else:
             st.markdown(f"${balance:,.0f} / $0 (目標未設定)")
             st.progress(0.0)
 
         # Display deadline if exists
-        deadline = row.get("Deadline")
+        deadline = getattr(row, "Deadline", "")
         if deadline and str(deadline).strip():
             deadline_date = ensure_date(deadline)
             if deadline_date:
                 st.caption(f"截止 {deadline_date.strftime('%Y/%m/%d')}")
 
-        # Action buttons
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            if st.button("存入", key=f"deposit_{goal_id}", use_container_width=True):
-                dialog_saving_deposit(goal_id, name)
-        with col2:
-            if st.button("支出", key=f"withdraw_{goal_id}", use_container_width=True):
-                dialog_saving_withdraw(goal_id, name, default_bank, default_payment)
-        with col3:
-            if st.button("完成目標", key=f"complete_{goal_id}", use_container_width=True):
-                dialog_complete_goal(goal_id, name, target)
+        # Actions：一個 radio 取代三顆按鈕
+        action = _pick_goal_action(goal_id, ("deposit", "withdraw", "complete"))
+        if action == "deposit":
+            _reset_submission_id("saving_deposit")
+            dialog_saving_deposit(goal_id, name)
+        elif action == "withdraw":
+            _reset_submission_id("saving_withdraw")
+            dialog_saving_withdraw(goal_id, name, default_bank, default_payment)
+        elif action == "complete":
+            dialog_complete_goal(goal_id, name, target)
 
         # Transaction details
-        with st.expander("📋 明細"):
-            render_saving_transactions(goal_id)
+        render_saving_details(goal_id)
 
 
 def render_pool_card(row):
-    """Render a pool card (Has_Target = FALSE)"""
-    goal_id = row["Goal_ID"]
-    name = row["Name"]
-    balance = get_saving_balance(goal_id)
+    """Render a pool card (Has_Target = FALSE)
+
+    row 為 itertuples 的一列，需含 tab_goals 預先算好的 Balance 欄位
+    """
+    goal_id = row.Goal_ID
+    name = row.Name
+    balance = row.Balance
 
     # Get defaults for withdraw dialog
-    default_bank = row.get("Default_Bank_ID", "") or ""
-    default_payment = row.get("Default_Payment_Method", "") or ""
+    default_bank = getattr(row, "Default_Bank_ID", "") or ""
+    default_payment = getattr(row, "Default_Payment_Method", "") or ""
 
     with st.container(border=True):
         st.markdown(f"**📈 {name}**")
         st.markdown(f"餘額：**${balance:,.0f}**")
 
-        # Action buttons (no "完成目標")
-        col1, col2 = st.columns(2)
-        with col1:
-            if st.button("存入", key=f"deposit_{goal_id}", use_container_width=True):
-                dialog_saving_deposit(goal_id, name)
-        with col2:
-            if st.button("支出", key=f"withdraw_{goal_id}", use_container_width=True):
-                dialog_saving_withdraw(goal_id, name, default_bank, default_payment)
+        # Actions (no "完成目標")
+        action = _pick_goal_action(goal_id, ("deposit", "withdraw"))
+        if action == "deposit":
+            _reset_submission_id("saving_deposit")
+            dialog_saving_deposit(goal_id, name)
+        elif action == "withdraw":
+            _reset_submission_id("saving_withdraw")
+            dialog_saving_withdraw(goal_id, name, default_bank, default_payment)
 
         # Transaction details
-        with st.expander("📋 明細"):
-            render_saving_transactions(goal_id)
+        render_saving_details(goal_id)
 
 
 def tab_goals():
@@ -3096,24 +4159,34 @@ def tab_goals():
     active_goals = goals[goals["Status"] == "Active"]
     completed_goals = goals[goals["Status"] == "Completed"]
 
-    has_target_goals = active_goals[active_goals["Has_Target"].apply(is_has_target)]
-    pool_goals = active_goals[~active_goals["Has_Target"].apply(is_has_target)]
+    # 餘額、目標金額與進度一次算好成欄位，卡片只負責顯示
+    balance = active_goals["Goal_ID"].map(get_saving_balances()).fillna(0.0).astype(float)
+    target = active_goals["Target_Amount"]
+    active_goals = active_goals.assign(
+        Balance=balance,
+        Target=target,
+        Progress=(balance / target.where(target > 0)).clip(lower=0.0, upper=1.0).fillna(0.0)
+    )
+
+    has_target = active_goals["HasTarget"].to_numpy()
+    has_target_goals = active_goals[has_target]
+    pool_goals = active_goals[~has_target]
 
     # Section: Has Target
     st.subheader("── 有目標 ──")
     if has_target_goals.empty:
         st.caption("尚無進行中的目標")
     else:
-        for _, row in has_target_goals.iterrows():
-            render_goal_card(row)
+        for goal in has_target_goals.itertuples(index=False):
+            render_goal_card(goal)
 
     # Section: Pools
     st.subheader("── 資金池（無目標）──")
     if pool_goals.empty:
         st.caption("尚無資金池")
     else:
-        for _, row in pool_goals.iterrows():
-            render_pool_card(row)
+        for goal in pool_goals.itertuples(index=False):
+            render_pool_card(goal)
 
     # Add buttons
     col1, col2 = st.columns(2)
@@ -3127,40 +4200,22 @@ def tab_goals():
     # Section: Completed
     if not completed_goals.empty:
         with st.expander("── 已完成 ──"):
-            transactions = load_transactions()
-            for _, row in completed_goals.iterrows():
-                goal_id = row["Goal_ID"]
-                name = row["Name"]
-                target = float(row["Target_Amount"]) if row["Target_Amount"] else 0
-
-                # Calculate actual expense from transactions
-                actual_expense = 0
-                if not transactions.empty:
-                    # Look for Goal_Complete transactions first
-                    completed_txns = transactions[
-                        (transactions["Goal_ID"] == goal_id) &
-                        (transactions["Type"] == TYPE_SAVING_OUT) &
-                        (transactions["Ref"].str.contains("Goal_Complete", na=False))
-                    ]
-                    if not completed_txns.empty:
-                        actual_expense = float(completed_txns["Amount"].sum())
-                    else:
-                        # Fallback: use total Saving_Out
-                        saving_out = transactions[
-                            (transactions["Goal_ID"] == goal_id) &
-                            (transactions["Type"] == TYPE_SAVING_OUT)
-                        ]
-                        if not saving_out.empty:
-                            actual_expense = float(saving_out["Amount"].sum())
-
-                # Format completed date
-                completed_at = row.get("Completed_At", "") or ""
-                date_str = ""
-                if completed_at:
-                    try:
-                        date_str = pd.to_datetime(completed_at).strftime("%Y/%m")
-                    except Exception:
-                        date_str = str(completed_at)[:7]
+            goal_expenses = get_goal_actual_expenses()
+
+            # 完成日期整欄格式化成 YYYY/MM：先用寫入時的固定格式，其餘逐筆推斷，
+            # 仍無法解析的保留原字串前 7 碼
+            completed_at = completed_goals.get("Completed_At", pd.Series("", index=completed_goals.index)).astype(str)
+            parsed = pd.to_datetime(completed_at, format="%Y-%m-%d %H:%M:%S", errors="coerce")
+            failed = parsed.isna() & completed_at.ne("")
+            if failed.any():
+                parsed[failed] = pd.to_datetime(completed_at[failed], format="mixed", errors="coerce")
+            date_strs = parsed.dt.strftime("%Y/%m").fillna(completed_at.str[:7])
+
+            for row, date_str in zip(completed_goals.itertuples(index=False), date_strs):
+                goal_id = row.Goal_ID
+                name = row.Name
+                target = float(row.Target_Amount)
+                actual_expense = goal_expenses.get(goal_id, 0.0)
 
                 # Display: target and actual expense
                 if target > 0:
@@ -3201,6 +4256,7 @@ def tab_strategy():
                 dialog_income()
         with col2:
             if st.button("↔ 轉帳", use_container_width=True):
+                _reset_submission_id("transfer")
                 dialog_transfer()
         with col3:
             if st.button("校正錢包", use_container_width=True):
@@ -3211,14 +4267,15 @@ def tab_strategy():
     # 週期狀態
     st.markdown("### 💫 週期狀態")
 
-    period = get_active_period()
+    period_info = get_active_period_info()
+    period = period_info["period"]
 
     if period is not None:
-        period_id = period["Period_ID"]
-        start_date = ensure_date(period["Start_Date"])
-        end_date = ensure_date(period["End_Date"])
+        period_id = period_info["period_id"]
+        start_date = period_info["start"]
+        end_date = period_info["end"]
 
-        if is_period_overdue(period):
+        if period_info["is_overdue"]:
             st.error(f"⚠️ 週期已結束，待結算")
             st.write(f"週期：{start_date.strftime('%m/%d')} ~ {end_date.strftime('%m/%d')}")
 
@@ -3228,7 +4285,7 @@ def tab_strategy():
                 st.rerun()
             st.caption("（會先結算當前週期）")
         else:
-            days_left = get_period_days_left(period)
+            days_left = period_info["days_left"]
             st.success(f"✓ 進行中")
             st.write(f"週期：{start_date.strftime('%m/%d')} ~ {end_date.strftime('%m/%d')}（剩 {days_left} 天）")
 
@@ -3240,9 +4297,11 @@ def tab_strategy():
 
         # 當期總覽
         with st.expander("📊 當期總覽"):
-            budget = float(period["Living_Budget"]) if period["Living_Budget"] else 0
-            remaining = get_living_remaining(period_id)
-            spent = budget - remaining
+            # 與記帳頁共用同一份快取的狀態快照，不另外掃描交易
+            dashboard = compute_dashboard_state(period_id)
+            budget = dashboard["living_budget"]
+            spent = dashboard["living_spent"]
+            remaining = dashboard["living_remaining"]
 
             col1, col2, col3 = st.columns(3)
             with col1:
@@ -3273,12 +4332,18 @@ def tab_strategy():
     if bank_accounts.empty:
         st.info("尚無銀行帳戶")
     else:
-        for _, bank in bank_accounts.iterrows():
-            bank_id = bank["Bank_ID"]
-            bank_name = bank["Name"]
-            bank_note = str(bank.get("Note", "") or "")
-            bank_status = bank.get("Status", "Active")
-            is_active = bank_status == "Active"
+        # 備註與狀態欄位一次整理好，迴圈只讀取欄位
+        banks = bank_accounts.assign(
+            Note=bank_accounts["Note"].fillna("").astype(str) if "Note" in bank_accounts.columns else "",
+            Status=bank_accounts["Status"] if "Status" in bank_accounts.columns else "Active"
+        )
+        active_flags = banks["Status"].eq("Active").to_numpy()
+
+        for bank, is_active in zip(banks.itertuples(index=False), active_flags):
+            bank_id = bank.Bank_ID
+            bank_name = bank.Name
+            bank_note = bank.Note
+            bank_status = bank.Status
 
             col1, col2 = st.columns([4, 1])
             with col1:
@@ -3345,9 +4410,8 @@ def tab_strategy():
 
     # CSV 匯出
     with st.expander("📤 資料匯出"):
-        transactions = load_transactions()
-        if not transactions.empty:
-            csv = transactions.to_csv(index=False).encode('utf-8-sig')
+        csv, txn_count = get_transactions_csv()
+        if txn_count:
             filename = f"budget_level_v2.1_export_{get_taiwan_today().strftime('%Y%m%d')}.csv"
             st.download_button(
                 label="📥 下載交易記錄 CSV",
@@ -3356,7 +4420,7 @@ def tab_strategy():
                 mime="text/csv",
                 use_container_width=True
             )
-            st.caption(f"共 {len(transactions)} 筆交易記錄")
+            st.caption(f"共 {txn_count} 筆交易記錄")
         else:
             st.info("尚無交易記錄")
 
@@ -3376,25 +4440,35 @@ def render_connection_status():
 
         st.success(f"已連線：{spreadsheet.title}")
 
-        # 載入所有資料並顯示統計
-        data = load_all_data()
+        # 顯示各 sheet 筆數（快取的整數，不需載入整份資料）
+        counts = get_data_counts()
 
         col1, col2, col3 = st.columns(3)
 
         with col1:
-            st.metric("Bank_Account", len(data["bank_accounts"]))
-            st.metric("Wallet_Log", len(data["wallet_log"]))
-            st.metric("Period", len(data["periods"]))
+            st.metric("Bank_Account", counts[SHEET_BANK_ACCOUNT])
+            st.metric("Wallet_Log", counts[SHEET_WALLET_LOG])
+            st.metric("Period", counts[SHEET_PERIOD])
 
         with col2:
-            st.metric("Category", len(data["categories"]))
-            st.metric("Sub_Tag", len(data["sub_tags"]))
-            st.metric("Saving_Goal", len(data["saving_goals"]))
+            st.metric("Category", counts[SHEET_CATEGORY])
+            st.metric("Sub_Tag", counts[SHEET_SUB_TAG])
+            st.metric("Saving_Goal", counts[SHEET_SAVING_GOAL])
 
         with col3:
-            st.metric("Transaction", len(data["transactions"]))
-            st.metric("Settlement_Log", len(data["settlement_log"]))
-            st.metric("Config", len(data["config"]))
+            st.metric("Transaction", counts[SHEET_TRANSACTION])
+            st.metric("Settlement_Log", counts[SHEET_SETTLEMENT_LOG])
+            st.metric("Config", counts[SHEET_CONFIG])
+
+        # 各載入函式的快取命中與耗時（本 session 累計）
+        cache_stats = st.session_state.get("_cache_stats", {})
+        if cache_stats:
+            st.caption("快取統計（本 session）")
+            stats_df = pd.DataFrame(
+                [(name, calls, misses, seconds * 1000) for name, (calls, misses, seconds) in cache_stats.items()],
+                columns=["函式", "呼叫", "未命中", "累計 ms"]
+            ).sort_values("累計 ms", ascending=False)
+            st.dataframe(stats_df, hide_index=True, use_container_width=True)
 
 
 # =============================================================================